@@ -21,7 +21,8 @@ if not os.path.exists(input_file):
     raise FileNotFoundError(f"File not found: {input_file}")
 
 # Load cleaned data
-data = np.genfromtxt(input_file, delimiter=',', skip_header=1).T  # Transpose for MNE
+# np.loadtxt skips genfromtxt's missing-value handling, which a cleaned file does not need.
+data = np.loadtxt(input_file, delimiter=',', skiprows=1, ndmin=2).T  # Transpose for MNE
 
 # Define EEG channels
 channels = ['TP9', 'AF7', 'AF8', 'TP10']
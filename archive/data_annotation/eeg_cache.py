@@ -0,0 +1,27 @@
+import os
+import hashlib
+import numpy as np
+
+# Parsed EEG arrays are cached here, away from the data directories, so the
+# dataloaders and scripts that list those directories never see the cache files.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+def load_eeg(csv_path, mmap_mode=None):
+    """
+    Load the numeric block of an EEG CSV (header row skipped).
+    The parsed array is cached as a .npy file in CACHE_DIR, so repeated runs
+    load it directly instead of re-parsing the text; a cache entry older than
+    its CSV is rebuilt. With mmap_mode set, a cached array is memory-mapped and
+    only the slices that are read get paged in.
+    """
+    csv_path = os.path.abspath(csv_path)
+    # Files of the same name in different directories get separate entries.
+    digest = hashlib.sha1(csv_path.encode()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    npy_path = os.path.join(CACHE_DIR, f"{stem}_{digest}.npy")
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(csv_path):
+        return np.load(npy_path, mmap_mode=mmap_mode)
+    data = np.loadtxt(csv_path, delimiter=",", skiprows=1, ndmin=2)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.save(npy_path, data)
+    return data
@@ -1,9 +1,11 @@
 import json
+import csv
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import argparse
 import os
+from eeg_cache import load_eeg
 
 def parse_action(filename):
     """
@@ -52,16 +54,47 @@ def get_detection_params(action):
     else:
         raise ValueError(f"Unsupported action: {action}")
 
-def plot_eeg_with_action(csv_file_path, json_file_path, action_label_name):
-    # Load the CSV file.
-    df = pd.read_csv(csv_file_path)
+def create_eeg_figure(action_label_name, channels=("TP9", "AF7", "AF8", "TP10")):
+    """
+    Create the figure, axes and one empty line per channel.
+    The figure is filled (and can be refilled for each file) by update_eeg_figure.
+    """
+    fig, axs = plt.subplots(len(channels), 1, sharex=True, figsize=(12, 10))
+    lines = []
+    for ax, channel in zip(axs, channels):
+        line, = ax.plot([], [], label=channel, color="blue")
+        lines.append(line)
+        ax.set_ylabel("Amplitude")
+    
+    axs[-1].set_xlabel("Time (s)")
+    xticks = np.arange(0, 3, 0.5)
+    for ax in axs:
+        ax.set_xticks(xticks)
+        ax.set_xlim(0, 2.5)
+    
+    fig.suptitle(f"EEG Signals with Annotated {action_label_name} Region")
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    return fig, axs, lines
+
+def update_eeg_figure(axs, lines, spans, csv_file_path, json_file_path, action_label_name):
+    """
+    Load one CSV/annotation pair into an existing figure.
+    Only the line data and the highlighted region are replaced; spans holds the
+    region patches drawn for the previous file and is updated in place.
+    """
+    # Load the CSV file (numeric block from the .npy cache when available).
+    with open(csv_file_path, newline="") as f:
+        header = next(csv.reader(f))
+    df = pd.DataFrame(load_eeg(csv_file_path), columns=header)
     
     # Use the 'timestamp' or 'timestamps' column as the x-axis if available;
-    # otherwise, use the row index.
+    # otherwise, use the row index. The offset is subtracted in place on a copy.
     if "timestamp" in df.columns:
-        time_axis = df["timestamp"].values - df["timestamp"].iloc[0]
+        time_axis = df["timestamp"].to_numpy(copy=True)
+        time_axis -= time_axis[0]
     elif "timestamps" in df.columns:
-        time_axis = df["timestamps"].values - df["timestamps"].iloc[0]
+        time_axis = df["timestamps"].to_numpy(copy=True)
+        time_axis -= time_axis[0]
     else:
         time_axis = np.arange(len(df))
     
@@ -79,31 +112,25 @@ def plot_eeg_with_action(csv_file_path, json_file_path, action_label_name):
     elif region is None:
         print(f"{action_label_name} event detected but no region was found in the annotation.")
     
-    # Define channels to plot.
-    channels = ["TP9", "AF7", "AF8", "TP10"]
-    
-    # Create subplots.
-    fig, axs = plt.subplots(len(channels), 1, sharex=True, figsize=(12, 10))
+    # Remove the region highlighted for the previous file.
+    for span in spans:
+        span.remove()
+    spans.clear()
     
-    for ax, channel in zip(axs, channels):
-        sig = df[channel].values
-        ax.plot(time_axis, sig, label=channel, color="blue")
+    for ax, line in zip(axs, lines):
+        line.set_data(time_axis, df[line.get_label()].values)
         # If an event is detected and a region exists, highlight the region.
         if label != -1 and region is not None:
             start_idx, end_idx = region
-            ax.axvspan(time_axis[start_idx], time_axis[end_idx], color="red", alpha=0.3,
-                       label=f"{action_label_name} Region")
-        ax.set_ylabel("Amplitude")
+            spans.append(ax.axvspan(time_axis[start_idx], time_axis[end_idx], color="red", alpha=0.3,
+                                    label=f"{action_label_name} Region"))
+        ax.relim()
+        ax.autoscale_view()
         ax.legend(loc="upper right")
-    
-    axs[-1].set_xlabel("Time (s)")
-    xticks = np.arange(0, 3, 0.5)
-    for ax in axs:
-        ax.set_xticks(xticks)
-        ax.set_xlim(0, 2.5)
-    
-    fig.suptitle(f"EEG Signals with Annotated {action_label_name} Region")
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+def plot_eeg_with_action(csv_file_path, json_file_path, action_label_name):
+    fig, axs, lines = create_eeg_figure(action_label_name)
+    update_eeg_figure(axs, lines, [], csv_file_path, json_file_path, action_label_name)
     return fig
 
 def main():
@@ -129,19 +156,22 @@ def main():
         
         action_label_name = get_detection_params(action)
         
+        # Build the figure once and only swap the data for each file.
+        fig, axs, lines = create_eeg_figure(action_label_name)
+        spans = []
         for file in os.listdir(data_dir):
             if file.endswith(".csv"):
                 base_name = os.path.splitext(file)[0]
                 csv_file_path = os.path.join(data_dir, file)
                 json_file_path = os.path.join(annotations_dir, f"{base_name}.json")
                 if os.path.exists(json_file_path):
-                    fig = plot_eeg_with_action(csv_file_path, json_file_path, action_label_name)
+                    update_eeg_figure(axs, lines, spans, csv_file_path, json_file_path, action_label_name)
                     save_path = os.path.join(plots_dir, f"{base_name}.png")
                     fig.savefig(save_path)
-                    plt.close(fig)
                     print(f"Saved plot for {base_name} to {save_path}")
                 else:
                     print(f"No annotation found for {base_name}. Skipping.")
+        plt.close(fig)
     
     elif args.basename:
         # Interactive mode: infer action from the basename.
@@ -1,10 +1,15 @@
 import os
+import sys
 import random
 import pandas as pd
 import numpy as np
 from scipy.stats import skew, kurtosis
 from glob import glob
 
+# The EEG cache helper is shared with the scripts one directory up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eeg_cache import load_eeg
+
 # List of directories containing the raw CSV files
 data_dirs = [
     "project_directory/data/jaw_clench/raw",
@@ -16,23 +21,26 @@ data_dirs = [
 # Define snippet length (you can adjust as needed)
 snippet_length = int(256 * 2.5)  # e.g., 640 timepoints
 
-# Function to compute statistics from an EEG snippet (2D array: channels x timepoints)
-def compute_stats(eeg_snippet):
-    means = np.mean(eeg_snippet, axis=1)
-    variances = np.var(eeg_snippet, axis=1)
-    skews = skew(eeg_snippet, axis=1, nan_policy='omit')
-    kurtoses = kurtosis(eeg_snippet, axis=1, nan_policy='omit')
+# Function to compute statistics from a batch of EEG snippets
+# (3D array: files x channels x timepoints). Every statistic is reduced over
+# the time axis in one vectorized call, then averaged across channels per file.
+def compute_stats(eeg_snippets):
+    means = np.mean(eeg_snippets, axis=-1)
+    variances = np.var(eeg_snippets, axis=-1)
+    skews = skew(eeg_snippets, axis=-1, nan_policy='omit')
+    kurtoses = kurtosis(eeg_snippets, axis=-1, nan_policy='omit')
     
     stats = {
-        "avg_mean": np.mean(means),
-        "avg_variance": np.mean(variances),
-        "avg_skew": np.nanmean(skews),
-        "avg_kurtosis": np.nanmean(kurtoses)
+        "avg_mean": np.mean(means, axis=1),
+        "avg_variance": np.mean(variances, axis=1),
+        "avg_skew": np.nanmean(skews, axis=1),
+        "avg_kurtosis": np.nanmean(kurtoses, axis=1)
     }
     return stats
 
-# List to collect statistics for all files
-all_stats = []
+# Snippets and per-file metadata, collected before the statistics are computed
+snippets = []
+file_info = []
 
 # Loop through each data directory and each file within
 for data_dir in data_dirs:
@@ -40,33 +48,49 @@ for data_dir in data_dirs:
     file_pattern = os.path.join(data_dir, "*.csv")
     for file_path in glob(file_pattern):
         try:
-            df = pd.read_csv(file_path)
-            # Assume first column is timestamps; remaining columns are EEG channels.
-            eeg_data = df.iloc[:, 1:].to_numpy().T  # Shape: (n_channels, n_timepoints)
-            n_channels, n_timepoints = eeg_data.shape
+            # Header row is skipped; first column is timestamps, remaining columns are EEG channels.
+            # The cached array is memory-mapped, shape (n_timepoints, n_columns).
+            data = load_eeg(file_path, mmap_mode='r')
+            n_timepoints = data.shape[0]
+            n_channels = data.shape[1] - 1
             
             # Extract a snippet (if signal is long enough, else use full signal)
+            start_idx = 0
             if n_timepoints > snippet_length:
                 start_idx = random.randint(0, n_timepoints - snippet_length)
-                snippet = eeg_data[:, start_idx:start_idx + snippet_length]
-            else:
-                snippet = eeg_data
-            
-            # Compute statistical features from the snippet
-            stats = compute_stats(snippet)
+            # Only the snippet window is read into memory. EEG samples are cast to
+            # float32, halving the memory the stats reductions stream over.
+            snippet = np.asarray(data[start_idx:start_idx + snippet_length, 1:].T, dtype=np.float32)  # Shape: (n_channels, snippet_length)
             
             # Optionally, add the file's directory info or action label
             # Here, we infer action from directory name by splitting the path.
             action = os.path.basename(os.path.normpath(data_dir))
             
-            stats["file"] = os.path.basename(file_path)
-            stats["action"] = action
-            stats["n_channels"] = n_channels
-            stats["n_timepoints"] = n_timepoints
-            all_stats.append(stats)
+            snippets.append(snippet)
+            file_info.append({
+                "file": os.path.basename(file_path),
+                "action": action,
+                "n_channels": n_channels,
+                "n_timepoints": n_timepoints
+            })
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
 
+# Group snippets by shape (almost all share (n_channels, snippet_length)), stack each
+# group into one (n_files, n_channels, n_timepoints) array and compute its stats at once.
+shape_groups = {}
+for idx, snippet in enumerate(snippets):
+    shape_groups.setdefault(snippet.shape, []).append(idx)
+
+# List to collect statistics for all files (kept in file order)
+all_stats = [None] * len(snippets)
+for indices in shape_groups.values():
+    batch_stats = compute_stats(np.stack([snippets[idx] for idx in indices]))
+    for row, idx in enumerate(indices):
+        stats = {name: values[row] for name, values in batch_stats.items()}
+        stats.update(file_info[idx])
+        all_stats[idx] = stats
+
 # Convert the collected stats to a DataFrame for further analysis
 stats_df = pd.DataFrame(all_stats)
 
@@ -1,10 +1,15 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 # Load your CSV file and adjust timestamps
 df = pd.read_csv("D:/Windows Folders/Desktop/Brain-Activity-Monitoring-BAM/project_directory/data/blinking/processed/data/blink_01.csv")
 df["timestamps"] = df["timestamps"] - df["timestamps"].iloc[0]
-df["annotation"] = "clean"
+
+# Cache the (monotonic) timestamps so each marked interval is located by binary
+# search, and keep the annotation as a per-sample mask (1 = blink, 0 = clean).
+ts = df["timestamps"].to_numpy()
+ann = np.zeros(len(df), dtype=np.int8)
 
 fig, ax = plt.subplots(figsize=(10, 6))
 ax.plot(df["timestamps"], df["TP10"], label="TP10")
@@ -13,25 +18,31 @@ ax.set_ylabel("Amplitude")
 ax.set_title("Click on two spots to mark blink interval")
 plt.legend()
 
-clicks = []  # List to store click timestamps
+t0, t1 = None, None  # Timestamps of the first and second click
 
 def on_click(event):
+    global t0, t1
     if event.inaxes != ax:
         return
     # Prevent additional clicks after two markers
-    if len(clicks) >= 2:
+    if t1 is not None:
         print("Two markers already set. No more markers can be added.")
         return
     ts_click = event.xdata
-    clicks.append(ts_click)
+    if t0 is None:
+        t0 = ts_click
+    else:
+        t1 = ts_click
     ax.axvline(ts_click, color="red", linestyle="--")
     plt.draw()
     print(f"Click recorded at {ts_click:.2f} seconds")
     
     # Once two clicks are recorded, annotate the interval
-    if len(clicks) == 2:
-        start_ts, end_ts = min(clicks), max(clicks)
-        df.loc[(df["timestamps"] >= start_ts) & (df["timestamps"] <= end_ts), "annotation"] = "blink"
+    if t1 is not None:
+        start_ts, end_ts = (t0, t1) if t0 <= t1 else (t1, t0)
+        start_idx = np.searchsorted(ts, start_ts, side="left")
+        end_idx = np.searchsorted(ts, end_ts, side="right")
+        ann[start_idx:end_idx] = 1
         print(f"Annotated blink from {start_ts:.2f} to {end_ts:.2f} seconds")
         # Draw a shaded region for visual feedback
         ax.axvspan(start_ts, end_ts, color="red", alpha=0.3)
@@ -41,4 +52,5 @@ fig.canvas.mpl_connect('button_press_event', on_click)
 plt.show()
 
 # Save the updated CSV file after closing the plot
+df["annotation"] = np.where(ann, "blink", "clean")
 df.to_csv("D:/Windows Folders/Desktop/Brain-Activity-Monitoring-BAM/project_directory/data/test/blink_01_annotated.csv", index=False)
@@ -17,19 +17,20 @@ BITE_DIR  = os.path.join(BASE_DIR, "biting")
 for directory in [BLINK_DIR, JAW_DIR, BITE_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Compiled filename patterns, keyed by prefix.
+_PATTERNS = {}
+
 def get_next_filename(directory, prefix):
     """
     Look in the directory for files matching the pattern prefix_XX.csv,
     then return a new filename with the number incremented.
     """
-    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
-    max_num = 0
-    for file in os.listdir(directory):
-        match = pattern.match(file)
-        if match:
-            num = int(match.group(1))
-            if num > max_num:
-                max_num = num
+    pattern = _PATTERNS.get(prefix)
+    if pattern is None:
+        pattern = _PATTERNS[prefix] = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
+    with os.scandir(directory) as entries:
+        max_num = max((int(match.group(1)) for entry in entries
+                       if (match := pattern.match(entry.name))), default=0)
     new_num = max_num + 1
     new_filename = f"{prefix}_{new_num:02d}.csv"
     return new_filename
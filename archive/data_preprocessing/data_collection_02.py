@@ -12,7 +12,7 @@ Features:
     - EEG channel values (columns ch1, ch2, ...),
     - and the current actionLabel.
 4. (Optional) Post-processes the recorded data:
-    - Filters the data (0.5–5 Hz) using MNE.
+    - Filters the data (0.5–5 Hz) with a zero-phase Butterworth bandpass.
     - Applies a simple peak detection to detect blinks.
     - Optionally plots the filtered signal with detected blink peaks.
     
@@ -27,14 +27,17 @@ import threading
 import time
 import pandas as pd
 import numpy as np
-import mne
 import matplotlib.pyplot as plt
 from pylsl import StreamInlet, resolve_streams
-from scipy.signal import find_peaks
+from scipy.signal import butter, find_peaks, sosfiltfilt
 import os
 
-# Global variables for real-time labeling control
-current_label = "neutral"
+# Global variables for real-time labeling control.
+# Labels are stored per sample as small integer codes; label_codes maps each
+# label string to its code (in first-seen order) and is only extended by the
+# listener thread. Rebinding current_label_code is atomic in CPython.
+label_codes = {"neutral": 0}
+current_label_code = 0
 stop_recording = False
 output_directory = "/blinking"
 
@@ -44,7 +47,7 @@ def label_listener():
     Type a new label (e.g., 'blink', 'neutral') and press Enter to update.
     Type 'q' to quit recording.
     """
-    global current_label, stop_recording
+    global current_label_code, stop_recording
     print("Labeling Instructions:")
     print(" - Type a new label (e.g., 'blink', 'neutral') and press Enter to update the current label.")
     print(" - Type 'q' and press Enter to stop recording.")
@@ -54,12 +57,33 @@ def label_listener():
             stop_recording = True
             print("Stopping recording...")
         else:
-            current_label = new_label
-            print(f"Current label updated to: {current_label}")
+            current_label_code = label_codes.setdefault(new_label, len(label_codes))
+            print(f"Current label updated to: {new_label}")
+
+def _grow(array, capacity):
+    """
+    Return a copy of array enlarged along the first axis to the given capacity.
+    """
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+# Butterworth bandpass filters in second-order-section form, keyed by (l_freq, h_freq, sfreq).
+_SOS_CACHE = {}
+
+def _bandpass_sos(l_freq, h_freq, sfreq, order=4):
+    """
+    Return the (cached) second-order sections of a Butterworth bandpass filter.
+    """
+    key = (l_freq, h_freq, sfreq)
+    sos = _SOS_CACHE.get(key)
+    if sos is None:
+        sos = _SOS_CACHE[key] = butter(order, [l_freq, h_freq], btype='band', fs=sfreq, output='sos')
+    return sos
 
 def post_process_blink_detection(df, channel_name='ch1', l_freq=0.5, h_freq=5.0, min_distance=50):
     """
-    Post-process the recorded data using MNE for filtering and blink detection.
+    Post-process the recorded data with a bandpass filter and blink detection.
     
     Args:
         df: DataFrame containing recorded data with 'timestamp' and EEG channel columns.
@@ -75,18 +99,19 @@ def post_process_blink_detection(df, channel_name='ch1', l_freq=0.5, h_freq=5.0,
     """
     # Estimate sampling frequency from the timestamp differences
     sfreq = 1.0 / np.mean(np.diff(df['timestamp']))
-    data = df[channel_name].values[np.newaxis, :]  # shape: (1, n_samples)
-    info = mne.create_info(ch_names=[channel_name], sfreq=sfreq, ch_types=['eeg'])
-    raw = mne.io.RawArray(data, info, verbose=False)
     
-    # Filter the data in the blink frequency range
-    raw.filter(l_freq, h_freq, picks=[channel_name], verbose=False)
-    filtered_signal = raw.get_data(picks=channel_name)[0]
+    # Filter the data in the blink frequency range (zero-phase, forward and backward)
+    filtered_signal = sosfiltfilt(_bandpass_sos(l_freq, h_freq, sfreq), df[channel_name].to_numpy())
+    times = np.arange(len(filtered_signal)) / sfreq
     
-    # Detect peaks: threshold is mean + 3*std
-    threshold = np.mean(filtered_signal) + 3 * np.std(filtered_signal)
+    # Detect peaks: threshold is median + 3 robust standard deviations, where the
+    # standard deviation is estimated from the median absolute deviation (MAD).
+    # Both medians are O(n) partitions and are not inflated by the blinks themselves.
+    median = np.median(filtered_signal)
+    mad = np.median(np.abs(filtered_signal - median))
+    threshold = median + 3 * 1.4826 * mad
     peaks, _ = find_peaks(filtered_signal, height=threshold, distance=min_distance)
-    return peaks, filtered_signal, raw.times
+    return peaks, filtered_signal, times
 
 def main():
     parser = argparse.ArgumentParser(
@@ -101,9 +126,9 @@ def main():
                         help="Plot the filtered signal with detected blink peaks (requires --postprocess).")
     args = parser.parse_args()
     
-    global stop_recording, current_label
+    global stop_recording, current_label_code
     stop_recording = False
-    current_label = "neutral"
+    current_label_code = label_codes["neutral"]
     
     # Start the labeling listener thread
     label_thread = threading.Thread(target=label_listener, daemon=True)
@@ -117,7 +142,15 @@ def main():
     inlet = StreamInlet(streams[0])
     print("EEG stream found. Starting real-time recording...")
     
-    data_records = []
+    # Preallocate the recording columns (sized from the stream rate and duration,
+    # grown by doubling if an indefinite or overlong recording fills them).
+    n_channels = inlet.info().channel_count()
+    sfreq = inlet.info().nominal_srate() or 256.0
+    capacity = int(sfreq * (args.duration if args.duration > 0 else 60) * 1.2) + 1
+    timestamps = np.empty(capacity)
+    channel_data = np.empty((capacity, n_channels), dtype=np.float32)
+    labels = np.empty(capacity, dtype=np.int16)
+    n_samples = 0
     start_time = time.time()
     
     # Main loop: continuously pull samples from the LSL stream
@@ -125,18 +158,28 @@ def main():
         sample, timestamp = inlet.pull_sample(timeout=1.0)
         if sample is None:
             continue  # No sample received in the allotted time
-        record = {"timestamp": timestamp, "actionLabel": current_label}
-        for i, value in enumerate(sample):
-            record[f"ch{i+1}"] = value
-        data_records.append(record)
+        if n_samples == capacity:
+            capacity *= 2
+            timestamps = _grow(timestamps, capacity)
+            channel_data = _grow(channel_data, capacity)
+            labels = _grow(labels, capacity)
+        timestamps[n_samples] = timestamp
+        channel_data[n_samples] = sample
+        labels[n_samples] = current_label_code
+        n_samples += 1
         
         # Stop after the specified duration if duration > 0
         if args.duration > 0 and (time.time() - start_time) >= args.duration:
             stop_recording = True
     
     print("Recording stopped. Saving data...")
-    df = pd.DataFrame(data_records)
-    df.to_csv("output_file", index=False)
+    # Build the DataFrame once from the filled columns, mapping label codes back to strings.
+    label_names = np.array(list(label_codes), dtype=object)
+    columns = {"timestamp": timestamps[:n_samples], "actionLabel": label_names[labels[:n_samples]]}
+    for i in range(n_channels):
+        columns[f"ch{i+1}"] = channel_data[:n_samples, i]
+    df = pd.DataFrame(columns)
+    df.to_csv(args.output_file, index=False)
     print(f"Data saved to {args.output_file}.")
     
     # Optional post-processing: blink detection using channel 'ch1'
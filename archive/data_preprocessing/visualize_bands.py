@@ -3,14 +3,15 @@ import numpy as np
 import mne
 import matplotlib.pyplot as plt
 
+# Define the EEG channels (adjust these names to match your CSV)
+channels = ["TP9", "AF7", "AF8", "TP10", "Right AUX"]
+
 # --- Step 1. Load CSV Data ---
+# Only the needed columns are parsed, with a fixed dtype so no type inference runs.
 csv_file = "project_directory/data/test/filtered_output.csv"
-df = pd.read_csv(csv_file)
+df = pd.read_csv(csv_file, usecols=["timestamps"] + channels, dtype=np.float64)
 df["timestamps"] = df["timestamps"] - df["timestamps"].iloc[0]
 
-# Define the EEG channels (adjust these names to match your CSV)
-channels = ["TP9", "AF7", "AF8", "TP10", "Right AUX"]
-
 # --- Step 2. Create MNE Raw Object ---
 # Convert EEG data (exclude timestamps) to a NumPy array with shape (n_channels, n_samples)
 data = df[channels].to_numpy().T
@@ -33,31 +34,45 @@ bands = {
     "Gamma": (30, 50)
 }
 
-# --- Process and Plot for Each EEG Channel ---
-for channel in channels:
-    # Pick the current channel data from the raw object
-    raw_channel = raw.copy().pick_channels([channel])
-    
-    # Create a new figure for the channel with one subplot per band
-    fig, axes = plt.subplots(len(bands), 1, figsize=(10, 10), sharex=True)
-    
-    for ax, (band_name, (l_freq, h_freq)) in zip(axes, bands.items()):
-        # Copy the channel and apply the bandpass filter for the current band
-        raw_band = raw_channel.copy().filter(l_freq=l_freq, h_freq=h_freq, fir_design="firwin", verbose=False)
-        
-        # Retrieve the filtered data and corresponding time points
-        data_band, times = raw_band[:]
-        
-        # Plot the first (and only) channel's data for this band
-        ax.plot(times, data_band[0], color="C0")
-        ax.set_ylabel(band_name)
-        ax.set_title(f"{band_name} ({l_freq}-{h_freq} Hz)")
-        ax.grid(True)
-    
-    # Label the x-axis on the bottom subplot
-    axes[-1].set_xlabel("Time (s)")
+# --- Filter Every Channel Once per Band ---
+# One FIR design and one pass over all channels per band; the channel plots below
+# only index into the filtered arrays (shape: (n_channels, n_samples)).
+band_data = {
+    band_name: raw.copy().filter(l_freq=l_freq, h_freq=h_freq, fir_design="firwin", verbose=False).get_data()
+    for band_name, (l_freq, h_freq) in bands.items()
+}
+times = raw.times
+
+# --- Plot Each EEG Channel ---
+# One figure with one subplot (and one persistent line) per band is built once;
+# stepping to the next channel only swaps the line data.
+fig, axes = plt.subplots(len(bands), 1, figsize=(10, 10), sharex=True)
+lines = {}
+for ax, (band_name, (l_freq, h_freq)) in zip(axes, bands.items()):
+    lines[band_name], = ax.plot(times, np.zeros_like(times), color="C0")
+    ax.set_ylabel(band_name)
+    ax.set_title(f"{band_name} ({l_freq}-{h_freq} Hz)")
+    ax.grid(True)
+
+# Label the x-axis on the bottom subplot
+axes[-1].set_xlabel("Time (s)")
+fig.suptitle("EEG Channel Filtered into 5 Brainwave Bands", fontsize=14)
+plt.tight_layout(rect=[0, 0, 1, 0.95])
+plt.show(block=False)
+
+for ch_idx, channel in enumerate(channels):
+    # Update each band's line in place with this channel's data and rescale its axes
+    for ax, band_name in zip(axes, bands):
+        lines[band_name].set_ydata(band_data[band_name][ch_idx])
+        ax.relim()
+        ax.autoscale_view()
     
     # Set a super title for the figure indicating which channel is displayed
-    plt.suptitle(f"EEG Channel {channel} Filtered into 5 Brainwave Bands", fontsize=14)
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
+    fig.suptitle(f"EEG Channel {channel} Filtered into 5 Brainwave Bands", fontsize=14)
+    fig.canvas.draw_idle()
+    
+    # Wait for a key press or mouse click before showing the next channel;
+    # closing the window ends the walk through the channels.
+    fig.waitforbuttonpress()
+    if not plt.fignum_exists(fig.number):
+        break
@@ -1,9 +1,19 @@
 import numpy as np
-import mne
+from scipy.signal import butter, sosfiltfilt
 import pyqtgraph as pg
-from pylsl import resolve_byprop, StreamInlet
+from pylsl import resolve_byprop, StreamInlet, cf_float32
 from PyQt5.QtWidgets import QWidget, QGridLayout, QVBoxLayout, QHBoxLayout, QCheckBox, QLabel
-from PyQt5.QtCore import QTimer, QSize
+from PyQt5.QtCore import QTimer, QSize, QObject, QThread, pyqtSignal, pyqtSlot
+
+# Draw curves through OpenGL when PyOpenGL is available; this skips the
+# CPU-side QPainterPath construction that dominates setData on long curves.
+try:
+    import OpenGL  # noqa: F401
+    pg.setConfigOption('useOpenGL', True)
+    pg.setConfigOption('enableExperimental', True)
+    pg.setConfigOption('antialias', False)
+except ImportError:
+    pass
 
 class ChannelContainer(QWidget):
     """
@@ -14,15 +24,22 @@ class ChannelContainer(QWidget):
         super().__init__(parent)
         self.aspect_ratio = aspect_ratio  # width / height
         self.inner_widget = inner_widget
+        self._base_hint = None  # Cached size hint, cleared on resize
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.inner_widget)
 
     def sizeHint(self):
-        # Provide a size hint based on the inner widget
-        base_hint = self.inner_widget.sizeHint()
-        width = base_hint.width() if base_hint.width() > 0 else 200
-        return QSize(width, int(width / self.aspect_ratio))
+        # Provide a size hint based on the inner widget (computed once per size).
+        if self._base_hint is None:
+            base_hint = self.inner_widget.sizeHint()
+            width = base_hint.width() if base_hint.width() > 0 else 200
+            self._base_hint = QSize(width, int(width / self.aspect_ratio))
+        return self._base_hint
+
+    def resizeEvent(self, event):
+        self._base_hint = None
+        super().resizeEvent(event)
 
     def heightForWidth(self, width):
         return int(width / self.aspect_ratio)
@@ -34,7 +51,28 @@ class ChannelContainer(QWidget):
         # Show or hide the inner plot while keeping the container visible.
         self.inner_widget.setVisible(visible)
 
+class FilterWorker(QObject):
+    """
+    Band-filters EEG buffers on a background thread.
+    Each request carries the time-ordered buffer and the bands to filter; the
+    filtered arrays are sent back to the GUI thread through the finished signal.
+    """
+    finished = pyqtSignal(dict)
+
+    def __init__(self, sos, parent=None):
+        super().__init__(parent)
+        self.sos = sos
+
+    @pyqtSlot(object, object)
+    def filter_bands(self, ordered, bands):
+        # Each band is filtered (zero-phase) for all channels in a single call.
+        filtered = {band: sosfiltfilt(self.sos[band], ordered, axis=1) for band in bands}
+        self.finished.emit(filtered)
+
 class LiveBandsWidget(QWidget):
+    # Sends (time-ordered buffer, enabled bands) to the filter worker's thread.
+    filter_requested = pyqtSignal(object, object)
+
     def __init__(self, fs=256, buffer_duration=8, update_interval=250, parent=None):
         super().__init__(parent)
         self.fs = fs
@@ -53,12 +91,22 @@ class LiveBandsWidget(QWidget):
             'Gamma': (30, 40)
         }
 
+        # Design a Butterworth bandpass (second-order sections) for each band once;
+        # update_plots only applies the stored filters. Coefficients are float32 like
+        # the sample buffer, so sosfiltfilt runs (and returns) float32 end to end.
+        self.sos = {}
+        for band, (l_freq, h_freq) in self.bands.items():
+            sos = butter(4, [l_freq, h_freq], btype='band', fs=self.fs, output='sos')
+            self.sos[band] = sos.astype(np.float32)
+
         # Dictionaries to hold the toggle status.
         self.enabled_bands = {band: True for band in self.bands.keys()}
         self.enabled_channels = {ch: True for ch in self.channel_names}
 
-        # Create buffers for each channel.
-        self.buffers = [np.zeros(self.buffer_length) for _ in range(self.n_channels)]
+        # Circular buffer holding the last buffer_length samples of every channel
+        # (one row per channel); write_idx is the position of the oldest sample.
+        self.buf = np.zeros((self.n_channels, self.buffer_length), dtype=np.float32)
+        self.write_idx = 0
         
         # Create a single horizontal layout for both band and channel toggles.
         self.toggle_layout = QHBoxLayout()
@@ -96,10 +144,12 @@ class LiveBandsWidget(QWidget):
         self.channel_curves = []     # For each channel, a dict mapping band names to curves.
         colors = {'Delta': 'b', 'Theta': 'g', 'Alpha': 'r', 'Beta': 'y', 'Gamma': 'm'}
         for ch in range(self.n_channels):
-            # Create the PlotWidget and lock its view aspect.
+            # Create the PlotWidget; its container below enforces the aspect ratio.
             plot = pg.PlotWidget(title=f"Channel {self.channel_names[ch]}")
             plot.addLegend()
-            plot.getViewBox().setAspectLocked(True)
+            # Draw at most about one (peak-preserving) point per pixel, and only the visible range.
+            plot.setDownsampling(auto=True, mode='peak')
+            plot.setClipToView(True)
             curves = {}
             for band, color in colors.items():
                 curves[band] = plot.plot(pen=color, name=band)
@@ -118,6 +168,17 @@ class LiveBandsWidget(QWidget):
         main_layout.addLayout(self.grid_layout)
         self.setLayout(main_layout)
         
+        # Band filtering runs in a worker thread so the GUI thread only plots.
+        # While a frame is being filtered, newer frames are not queued behind it.
+        self.filter_busy = False
+        self.filter_thread = QThread(self)
+        self.filter_worker = FilterWorker(self.sos)
+        self.filter_worker.moveToThread(self.filter_thread)
+        self.filter_requested.connect(self.filter_worker.filter_bands)
+        self.filter_worker.finished.connect(self.on_filtered)
+        self.filter_thread.finished.connect(self.filter_worker.deleteLater)
+        self.filter_thread.start()
+        
         # Connect to the EEG stream.
         self.inlet = None
         self.connect_to_stream()
@@ -144,35 +205,88 @@ class LiveBandsWidget(QWidget):
     
     def connect_to_stream(self):
         streams = resolve_byprop('type', 'EEG', timeout=5)
+        self.lsl_buf = None
         if streams:
             self.inlet = StreamInlet(streams[0])
+            # float32 streams (e.g. muselsl) are pulled straight into a preallocated
+            # array, skipping the per-sample Python lists.
+            info = self.inlet.info()
+            if info.channel_format() == cf_float32:
+                self.lsl_buf = np.empty((self.fs, info.channel_count()), dtype=np.float32)
         else:
             self.inlet = None
     
+    def showEvent(self, event):
+        # Resume refreshing; samples queued while hidden are dropped so the plots show live data.
+        super().showEvent(event)
+        if self.filter_thread.isRunning():
+            if self.inlet is not None:
+                self.inlet.flush()
+            self.timer.start(self.update_interval)
+    
+    def hideEvent(self, event):
+        # Nothing is drawn while hidden (e.g. toggled off in the combined view), so stop refreshing.
+        super().hideEvent(event)
+        self.timer.stop()
+    
     def update_plots(self):
-        if self.inlet is None:
+        if not self.isVisible() or self.inlet is None:
             return
         
-        chunk, _ = self.inlet.pull_chunk(timeout=0.0, max_samples=self.fs)
-        if chunk:
-            chunk = np.array(chunk)  # shape: (n_samples, n_channels)
-            for ch in range(self.n_channels):
-                if ch >= chunk.shape[1]:
-                    continue
-                new_data = chunk[:, ch]
-                self.buffers[ch] = np.concatenate((self.buffers[ch], new_data))
-                if len(self.buffers[ch]) > self.buffer_length:
-                    self.buffers[ch] = self.buffers[ch][-self.buffer_length:]
-            # Update only the enabled channels and bands.
+        if self.lsl_buf is not None:
+            _, timestamps = self.inlet.pull_chunk(timeout=0.0, max_samples=self.fs, dest_obj=self.lsl_buf)
+            if not timestamps:
+                return
+            chunk = self.lsl_buf[:len(timestamps)]  # shape: (n_samples, n_channels)
+        else:
+            chunk, _ = self.inlet.pull_chunk(timeout=0.0, max_samples=self.fs)
+            if not chunk:
+                return
+            chunk = np.asarray(chunk, dtype=np.float32)  # shape: (n_samples, n_channels)
+        self.write_samples(chunk[:, :self.n_channels].T)
+        if self.filter_busy:
+            return
+        bands = [band for band in self.bands if self.enabled_bands[band]]
+        if not bands:
+            return
+        # Unroll the circular buffer into time order once per frame; the copy
+        # is handed to the worker thread, so later writes cannot race with it.
+        ordered = np.concatenate((self.buf[:, self.write_idx:], self.buf[:, :self.write_idx]), axis=1)
+        self.filter_busy = True
+        self.filter_requested.emit(ordered, bands)
+    
+    def on_filtered(self, filtered):
+        # Runs on the GUI thread: update only the enabled channels.
+        self.filter_busy = False
+        for band, data in filtered.items():
             for ch in range(self.n_channels):
-                if not self.enabled_channels[self.channel_names[ch]]:
-                    continue
-                for band, (l_freq, h_freq) in self.bands.items():
-                    if not self.enabled_bands[band]:
-                        continue
-                    filtered = mne.filter.filter_data(self.buffers[ch], sfreq=self.fs,
-                                                      l_freq=l_freq, h_freq=h_freq, verbose=False)
-                    self.channel_curves[ch][band].setData(filtered)
+                if self.enabled_channels[self.channel_names[ch]]:
+                    # Filtered data is always finite, so pyqtgraph's check is skipped.
+                    self.channel_curves[ch][band].setData(data[ch], skipFiniteCheck=True)
+    
+    def write_samples(self, new_data):
+        # Copy new samples (shape: (n_channels, n_samples)) into the circular buffer.
+        n_ch = new_data.shape[0]
+        k = new_data.shape[1]
+        if k >= self.buffer_length:
+            # Only the most recent buffer_length samples are kept.
+            self.buf[:n_ch] = new_data[:, -self.buffer_length:]
+            self.write_idx = 0
+            return
+        end = self.write_idx + k
+        if end <= self.buffer_length:
+            self.buf[:n_ch, self.write_idx:end] = new_data
+        else:
+            split = self.buffer_length - self.write_idx
+            self.buf[:n_ch, self.write_idx:] = new_data[:, :split]
+            self.buf[:n_ch, :k - split] = new_data[:, split:]
+        self.write_idx = end % self.buffer_length
+    
+    def stop(self):
+        # Stop refreshing and shut down the filter thread.
+        self.timer.stop()
+        self.filter_thread.quit()
+        self.filter_thread.wait()
     
     def reset_layout(self):
         # In a grid layout, we can simply update the geometry.
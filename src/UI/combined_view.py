@@ -87,9 +87,8 @@ class CombinedViewWindow(QMainWindow):
             return
         self._destroyed = True
 
-        # Stop LiveBandsWidget's timer if it exists.
-        if hasattr(self.live_bands_view, 'timer') and self.live_bands_view.timer is not None:
-            self.live_bands_view.timer.stop()
+        # Stop LiveBandsWidget's timer and filter thread.
+        self.live_bands_view.stop()
 
         # Stop the embedded Muse view's update thread.
         if hasattr(self, 'muse_view') and self.muse_view is not None:
@@ -1,20 +1,31 @@
 import joblib
 import numpy as np
 import random
-import os, pandas as pd
+import os
 import time
-from scipy.signal import welch, butter, filtfilt
+import queue
+import threading
+from scipy.signal import welch, butter, sosfiltfilt
 from scipy.stats import skew, kurtosis
-import time
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
 
 # ---------------- Filtering & Normalization Functions ----------------
 
+# Butterworth bandpass filters in second-order-section form, designed once per
+# (lowcut, highcut, fs, order) and reused for every snippet.
+_SOS_CACHE = {}
+
 def bandpass_filter(signal, fs, lowcut, highcut, order=4):
-    nyq = 0.5 * fs  # Nyquist frequency
-    low = lowcut / nyq
-    high = highcut / nyq
-    b, a = butter(order, [low, high], btype='band')
-    filtered_signal = filtfilt(b, a, signal)
+    # Filters along the last axis, so a (channels x samples) snippet is filtered in one call.
+    key = (lowcut, highcut, fs, order)
+    sos = _SOS_CACHE.get(key)
+    if sos is None:
+        nyq = 0.5 * fs  # Nyquist frequency
+        low = lowcut / nyq
+        high = highcut / nyq
+        sos = _SOS_CACHE[key] = butter(order, [low, high], btype='band', output='sos')
+    filtered_signal = sosfiltfilt(sos, signal, axis=-1)
     return filtered_signal
 
 def filter_biting(signal, fs):
@@ -29,10 +40,24 @@ def filter_eyebrow(signal, fs):
 def filter_jaw(signal, fs):
     return bandpass_filter(signal, fs, lowcut=20, highcut=50)
 
-def compute_band_power(signal, fs, lowcut, highcut):
-    freqs, psd = welch(signal, fs=fs, nperseg=min(256, len(signal)))
-    band_idx = (freqs >= lowcut) & (freqs <= highcut)
-    band_power = np.trapezoid(psd[band_idx], freqs[band_idx])
+# Welch frequency-bin ranges of each band, keyed by (fs, nperseg, lowcut, highcut).
+# The Welch frequency grid depends only on fs and nperseg, so each range is found once.
+_BAND_SLICES = {}
+
+def band_slice(fs, nperseg, lowcut, highcut):
+    key = (fs, nperseg, lowcut, highcut)
+    band = _BAND_SLICES.get(key)
+    if band is None:
+        # The grid is sorted, so the bins with lowcut <= f <= highcut are a contiguous range.
+        freqs = np.fft.rfftfreq(nperseg, d=1.0 / fs)
+        start = np.searchsorted(freqs, lowcut, side='left')
+        stop = np.searchsorted(freqs, highcut, side='right')
+        band = _BAND_SLICES[key] = slice(start, stop)
+    return band
+
+def compute_band_power(freqs, psd, band):
+    # Integrates a precomputed (per-channel) Welch PSD over the band slice, along the last axis.
+    band_power = np.trapezoid(psd[..., band], freqs[band], axis=-1)
     return band_power
 
 # ---------------- Filter Selector Model Integration ----------------
@@ -42,6 +67,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 filter_model_path = os.path.join(current_dir, "..", "classifier", "models", "filter_selector.pkl")
 filter_model_path = os.path.normpath(filter_model_path)
 filter_clf, filter_label_encoder = joblib.load(filter_model_path)
+# Single-snippet predictions gain nothing from a worker pool, whatever n_jobs it was trained with.
+filter_clf.n_jobs = 1
 
 def extract_filter_features(snippet, fs):
     """
@@ -56,8 +83,11 @@ def extract_filter_features(snippet, fs):
     avg_variance = np.mean(np.var(snippet, axis=1))
     avg_skew = np.nanmean(skew(snippet, axis=1, nan_policy='omit'))
     avg_kurtosis = np.nanmean(kurtosis(snippet, axis=1, nan_policy='omit'))
-    avg_high_freq_power = np.mean([compute_band_power(channel, fs, 20, 50) for channel in snippet])
-    avg_low_freq_power = np.mean([compute_band_power(channel, fs, 0.1, 4) for channel in snippet])
+    # One Welch estimate for all channels, shared by both bands.
+    nperseg = min(256, snippet.shape[1])
+    freqs, psd = welch(snippet, fs=fs, nperseg=nperseg, axis=1)
+    avg_high_freq_power = np.mean(compute_band_power(freqs, psd, band_slice(fs, nperseg, 20, 50)))
+    avg_low_freq_power = np.mean(compute_band_power(freqs, psd, band_slice(fs, nperseg, 0.1, 4)))
     power_ratio = avg_high_freq_power / avg_low_freq_power if avg_low_freq_power != 0 else np.inf
     return np.array([avg_variance, avg_skew, avg_kurtosis, avg_high_freq_power, avg_low_freq_power, power_ratio])
 
@@ -80,8 +110,8 @@ def choose_filter(snippet, fs):
 
 def apply_filter_to_snippet(snippet, fs):
     filter_func, filter_name = choose_filter(snippet, fs)
-    filtered = [filter_func(channel, fs) for channel in snippet]
-    return np.array(filtered), filter_name
+    filtered = filter_func(snippet, fs)
+    return filtered, filter_name
 
 # ---------------- End Filtering Functions ----------------
 
@@ -91,6 +121,11 @@ model_path = os.path.join(current_dir, "..", "classifier", "models", "eeg_model.
 model_path = os.path.normpath(model_path)
 
 clf = joblib.load(model_path)
+if isinstance(clf, tuple):
+    # Newer training runs save (classifier, label encoder), like the filter selector.
+    clf, _ = clf
+# Predict single snippets without a worker pool, as for the filter selector.
+clf.n_jobs = 1
 
 # Build the buffer directory path relative to this script.
 buffer_dir = os.path.join(current_dir, "..", "classifier", "buffer")
@@ -99,71 +134,124 @@ buffer_dir = os.path.normpath(buffer_dir)
 # Ensure the buffer directory exists before using it.
 os.makedirs(buffer_dir, exist_ok=True)
 
-# Record files already in the buffer when the program starts
-processed_files = set(os.listdir(buffer_dir))
-
 # Initialize predicted_action to a default value
 predicted_action = "None"
 
+# Feature row reused for every prediction (6 features per channel); reallocated
+# only if the channel count changes.
+_feature_buffer = np.empty((1, 0), dtype=np.float32)
+
 def extract_features_from_sample(eeg_sample, sfreq):
-    feature_vector = []
-    for channel in eeg_sample:
-        freqs, psd = welch(channel, sfreq, nperseg=min(256, len(channel)))
-        feature_vector.extend([psd.mean(), psd.std()])
-    feature_vector.extend(eeg_sample.mean(axis=1).tolist())
-    feature_vector.extend(eeg_sample.std(axis=1).tolist())
-    feature_vector.extend(skew(eeg_sample, axis=1).tolist())
-    feature_vector.extend(kurtosis(eeg_sample, axis=1).tolist())
-    return np.array(feature_vector).reshape(1, -1)
-
-while True:  
-    current_files = set(os.listdir(buffer_dir))
-    new_files = current_files - processed_files
-
-    if new_files:
-        for selected_file in sorted(new_files):
-            file_path = os.path.join(buffer_dir, selected_file)
-            try:
-                df = pd.read_csv(file_path)
-            except Exception as e:
-                print("Error reading file", selected_file, ":", e, flush=True)
-                continue
-
-            timestamps = df.iloc[:, 0].values
-            eeg_data = df.iloc[:, 1:].to_numpy().T
-            snippet_length = int(256 * 2.5)
-            n_channels, n_timepoints = eeg_data.shape
-
-            if n_timepoints > snippet_length:
-                start_idx = random.randint(0, n_timepoints - snippet_length)
-                snippet = eeg_data[:, start_idx:start_idx + snippet_length]
-            else:
-                snippet = eeg_data
-
-            sfreq = 256
-            
-            # Start timing before processing
-            start_time = time.time()
-
-            # Use the trained filter selector model to choose a filter and process the snippet
-            snippet, chosen_filter = apply_filter_to_snippet(snippet, sfreq)
-            print("Chosen Filter:", chosen_filter, flush=True)
-            
-            # Extract the full feature vector
-            features = extract_features_from_sample(snippet, sfreq)
-            
-            predicted_numeric = clf.predict(features)
-            mapping = {0: "Biting", 1: "Blink", 2: "Eyebrow", 3: "Jaw Clench"}
-            predicted_action = mapping[predicted_numeric[0]]
-            print("Predicted Action:", predicted_action, flush=True)
-
-            # End timing after prediction
-            end_time = time.time()
-
-            # Calculate and print latency in milliseconds
-            latency_ms = (end_time - start_time) * 1000
-            print(f"End-to-end processing latency: {latency_ms:.2f} ms\n", flush=True)
-
-            processed_files.add(selected_file)
+    """
+    Fills and returns the shared (1, n_features) feature row for one snippet:
+    per-channel PSD mean/std pairs, then channel means, stds, skewness and kurtosis.
+    The row is overwritten by the next call.
+    """
+    global _feature_buffer
+    n_channels = eeg_sample.shape[0]
+    if _feature_buffer.shape[1] != 6 * n_channels:
+        _feature_buffer = np.empty((1, 6 * n_channels), dtype=np.float32)
+    feature_vector = _feature_buffer[0]
+    # One Welch estimate for all channels (one PSD row per channel).
+    freqs, psd = welch(eeg_sample, sfreq, nperseg=min(256, eeg_sample.shape[1]), axis=1)
+    feature_vector[0:2 * n_channels:2] = psd.mean(axis=1)
+    feature_vector[1:2 * n_channels:2] = psd.std(axis=1)
+    feature_vector[2 * n_channels:3 * n_channels] = eeg_sample.mean(axis=1)
+    feature_vector[3 * n_channels:4 * n_channels] = eeg_sample.std(axis=1)
+    feature_vector[4 * n_channels:5 * n_channels] = skew(eeg_sample, axis=1)
+    feature_vector[5 * n_channels:] = kurtosis(eeg_sample, axis=1)
+    return _feature_buffer
+
+class BufferFileHandler(FileSystemEventHandler):
+    """
+    Queues the path of every file created in the buffer directory.
+    """
+    def __init__(self, file_queue):
+        super().__init__()
+        self.file_queue = file_queue
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.file_queue.put((event.src_path, 1))
+
+def wait_until_written(file_path, interval=0.05):
+    # The recorder creates the file before writing it, so wait until its size settles.
+    previous_size = -1
+    size = os.path.getsize(file_path)
+    while size != previous_size:
+        time.sleep(interval)
+        previous_size, size = size, os.path.getsize(file_path)
+
+# watchdog reports each file only once, so a read that fails (e.g. the file is
+# still being written) is retried after a short delay, a bounded number of times.
+MAX_READ_ATTEMPTS = 5
+READ_RETRY_DELAY = 0.2  # seconds
+
+def retry_later(file_queue, file_path, attempt):
+    # A timer re-queues the file, so other files are not held up meanwhile.
+    timer = threading.Timer(READ_RETRY_DELAY, file_queue.put, args=((file_path, attempt + 1),))
+    timer.daemon = True
+    timer.start()
+
+# Watch the buffer directory; files already there at startup are not processed.
+# New files are handled as soon as they are created instead of on a polling interval.
+file_queue = queue.Queue()
+observer = Observer()
+observer.schedule(BufferFileHandler(file_queue), buffer_dir, recursive=False)
+observer.start()
+
+while True:
+    file_path, attempt = file_queue.get()
+    selected_file = os.path.basename(file_path)
+    try:
+        wait_until_written(file_path)
+        # Header row is skipped; first column is timestamps, remaining columns are EEG channels.
+        data = np.loadtxt(file_path, delimiter=",", skiprows=1, ndmin=2)
+        if data.shape[0] == 0 or data.shape[1] < 2:
+            raise ValueError("no samples written yet")
+    except FileNotFoundError:
+        print("File", selected_file, "was removed before it could be read", flush=True)
+        continue
+    except Exception as e:
+        if attempt < MAX_READ_ATTEMPTS:
+            retry_later(file_queue, file_path, attempt)
+        else:
+            print("Error reading file", selected_file, ":", e, flush=True)
+        continue
+
+    timestamps = data[:, 0]
+    eeg_data = data[:, 1:].T
+    snippet_length = int(256 * 2.5)
+    n_channels, n_timepoints = eeg_data.shape
+
+    if n_timepoints > snippet_length:
+        start_idx = random.randint(0, n_timepoints - snippet_length)
+        snippet = eeg_data[:, start_idx:start_idx + snippet_length]
+    else:
+        snippet = eeg_data
+    # EEG samples carry far less than float32 precision; timestamps stay float64.
+    snippet = np.asarray(snippet, dtype=np.float32)
+
+    sfreq = 256
+    
+    # Start timing before processing
+    start_time = time.time()
+
+    # Use the trained filter selector model to choose a filter and process the snippet
+    snippet, chosen_filter = apply_filter_to_snippet(snippet, sfreq)
+    print("Chosen Filter:", chosen_filter)  # Flushed together with the prediction below.
     
-    time.sleep(1)
+    # Extract the full feature vector
+    features = extract_features_from_sample(snippet, sfreq)
+    
+    predicted_numeric = clf.predict(features)
+    mapping = {0: "Biting", 1: "Blink", 2: "Eyebrow", 3: "Jaw Clench"}
+    predicted_action = mapping[predicted_numeric[0]]
+    print("Predicted Action:", predicted_action, flush=True)
+
+    # End timing after prediction
+    end_time = time.time()
+
+    # Calculate and print latency in milliseconds
+    latency_ms = (end_time - start_time) * 1000
+    print(f"End-to-end processing latency: {latency_ms:.2f} ms\n", flush=True)
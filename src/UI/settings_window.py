@@ -5,7 +5,7 @@ from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QLabel, QToolBar,
     QAction, QStackedWidget, QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher
 
 class SettingsWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -78,10 +78,32 @@ class SettingsWindow(QMainWindow):
         self.stats_action.setChecked(True)
         self.stacked_widget.setCurrentWidget(self.stats_page)
         
-        # Set up a timer to update the latest file info periodically.
-        self.info_timer = QTimer(self)
-        self.info_timer.timeout.connect(self.update_model_info)
-        self.info_timer.start(1000)  # update every second
+        # Refresh the latest file info whenever the buffer directory changes.
+        self.buffer_dir = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "classifier", "buffer")
+        )
+        os.makedirs(self.buffer_dir, exist_ok=True)
+        # (index, filename) of the newest buffer file, rescanned only when the directory changes.
+        self._buf_re = re.compile(r"buffer_(\d+)\.csv$")
+        self._latest_cache = (-1, None)
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self.on_buffer_dir_changed)
+        if not self.fs_watcher.addPath(self.buffer_dir):
+            # The directory cannot be watched (e.g. on some network drives); poll it slowly instead.
+            self.info_timer = QTimer(self)
+            self.info_timer.timeout.connect(self.on_buffer_dir_changed)
+            self.info_timer.start(30000)
+        
+        # Latest predictions, keyed by model type; seeded from the main window and
+        # then updated whenever it emits a new prediction.
+        self._predictions = {
+            "Filter Model": getattr(parent, "predicted_filter", "N/A"),
+            "Action Model": getattr(parent, "predicted_action", "N/A"),
+        }
+        if parent is not None and hasattr(parent, "prediction_changed"):
+            parent.prediction_changed.connect(self.on_prediction_changed)
+        
+        self.on_buffer_dir_changed()
 
     def on_model_selection_changed(self, index):
         selected_model = self.model_combo.itemText(index)
@@ -89,6 +111,11 @@ class SettingsWindow(QMainWindow):
         # Immediately update the file and prediction labels when the selection changes.
         self.update_model_info()
 
+    def on_prediction_changed(self, predicted_filter, predicted_action):
+        self._predictions["Filter Model"] = predicted_filter
+        self._predictions["Action Model"] = predicted_action
+        self.update_prediction_label()
+
     def update_tuning_message(self, selected_model):
         if selected_model == "Filter Model":
             self.tuning_message.setText("Filter Model Tuning:\nConfigure filter model parameters here.")
@@ -97,59 +124,52 @@ class SettingsWindow(QMainWindow):
         else:
             self.tuning_message.setText("")
 
-    def _get_latest_buffer_file(self):
+    def _scan_latest_buffer_file(self):
         """
         Scans the buffer directory for CSV files with names like 'buffer_XX.csv'
-        and returns the file with the highest numeric index.
+        and returns (index, filename) of the file with the highest numeric index.
         """
-        buffer_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "classifier", "buffer")
-        if not os.path.exists(buffer_dir):
-            return None
-        files = [f for f in os.listdir(buffer_dir) if f.startswith("buffer_") and f.endswith(".csv")]
-        if not files:
-            return None
-        # Sort files by the numeric portion.
-        def extract_num(filename):
-            match = re.search(r"buffer_(\d+)\.csv", filename)
-            if match:
-                return int(match.group(1))
-            return 0
-        files.sort(key=extract_num)
-        return files[-1]
-
-    def get_latest_prediction(self, model_type):
+        latest = (-1, None)
+        if not os.path.exists(self.buffer_dir):
+            return latest
+        with os.scandir(self.buffer_dir) as entries:
+            for entry in entries:
+                match = self._buf_re.match(entry.name)
+                if match:
+                    num = int(match.group(1))
+                    if num > latest[0]:
+                        latest = (num, entry.name)
+        return latest
+
+    def _get_latest_buffer_file(self):
         """
-        Returns the latest prediction based on the model type.
-        For 'Filter Model' it returns the chosen filter from the main window,
-        and for 'Action Model' it extracts the predicted action from the main window.
+        Returns the cached name of the newest buffer file (None if there is none).
         """
-        if model_type == "Filter Model":
-            if self.parent() is not None and hasattr(self.parent(), "predicted_filter"):
-                return self.parent().predicted_filter
-            return "N/A"
-        elif model_type == "Action Model":
-            if self.parent() is not None and hasattr(self.parent(), "predicted_action_label"):
-                text = self.parent().predicted_action_label.text()
-                if "Predicted Action:" in text:
-                    parts = text.split("Predicted Action:")
-                    if len(parts) > 1:
-                        return parts[1].strip()
-            return "N/A"
-        return "N/A"
+        return self._latest_cache[1]
+
+    def on_buffer_dir_changed(self, path=None):
+        # Rescan once per directory change; other refreshes reuse the cached result.
+        self._latest_cache = self._scan_latest_buffer_file()
+        self.update_model_info()
 
     def update_model_info(self):
         """
         Updates the latest file name from the buffer and the prediction
         based on the current model selection.
         """
-        model_type = self.model_combo.currentText()
         latest_file = self._get_latest_buffer_file()
         if latest_file is None:
             self.latest_file_label.setText("Latest file: None")
         else:
             self.latest_file_label.setText(f"Latest file: {latest_file}")
-        
-        prediction = self.get_latest_prediction(model_type)
+        self.update_prediction_label()
+
+    def update_prediction_label(self):
+        """
+        Shows the cached prediction for the current model selection.
+        """
+        model_type = self.model_combo.currentText()
+        prediction = self._predictions.get(model_type, "N/A")
         if model_type == "Filter Model":
             self.prediction_label.setText(f"Predicted Filter: {prediction}")
         elif model_type == "Action Model":
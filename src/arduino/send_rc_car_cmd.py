@@ -1,31 +1,94 @@
+import os
 import requests
 import socket
 import subprocess
 import re
 import time
 import platform
+from concurrent.futures import ThreadPoolExecutor
 
 arduino_ip = ""
+arduinoHTTPServerPort = 23
+
+# Persistent TCP connection to the Arduino, opened on first use and after errors
+_sock = None
+
+# Single background thread that sends commands in order; it also owns the
+# (possibly 30 s) connection probe, so callers never block on it.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arduino")
+
+_SYSTEM = platform.system()
+
+# ARP table pattern for `arp -an` output (macOS/BSD): "? (ip) at mac on ..."
+_ARP_RE = re.compile(r"\((.*?)\)\s+at\s+([0-9A-Fa-f:]{17})")
+
+
+def _read_arp_linux():
+    """Yield (ip, mac) pairs straight from the kernel's ARP table."""
+    with open("/proc/net/arp") as f:
+        next(f)  # Skip the header row
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 4:
+                yield fields[0], fields[3]
+
+
+def _read_arp_windows():
+    """Yield (ip, mac) pairs from GetIpNetTable instead of spawning `arp -a`."""
+    import ctypes
+    from ctypes import wintypes
+
+    class MIB_IPNETROW(ctypes.Structure):
+        _fields_ = [
+            ("dwIndex", wintypes.DWORD),
+            ("dwPhysAddrLen", wintypes.DWORD),
+            ("bPhysAddr", ctypes.c_ubyte * 8),
+            ("dwAddr", wintypes.DWORD),
+            ("dwType", wintypes.DWORD),
+        ]
+
+    get_table = ctypes.windll.iphlpapi.GetIpNetTable
+    size = wintypes.ULONG(0)
+    get_table(None, ctypes.byref(size), False)  # Ask for the required buffer size
+    buf = ctypes.create_string_buffer(size.value)
+    if get_table(buf, ctypes.byref(size), False) != 0:
+        return
+
+    # MIB_IPNETTABLE: a DWORD entry count followed by the rows
+    n_entries = wintypes.DWORD.from_buffer(buf).value
+    rows = (MIB_IPNETROW * n_entries).from_buffer(buf, ctypes.sizeof(wintypes.DWORD))
+    for row in rows:
+        ip = socket.inet_ntoa(row.dwAddr.to_bytes(4, "little"))
+        mac = ":".join(f"{b:02x}" for b in row.bPhysAddr[:row.dwPhysAddrLen])
+        yield ip, mac
+
+
+def _read_arp_table():
+    """
+    Yield the (ip, mac) pairs currently in the ARP table, one at a time, so a
+    caller that stops at the first match never parses the remaining entries.
+    """
+    if _SYSTEM == "Linux" and os.path.exists("/proc/net/arp"):
+        yield from _read_arp_linux()
+    elif _SYSTEM == "Windows":
+        yield from _read_arp_windows()
+    else:
+        # macOS/BSD: -n skips reverse DNS lookups for every entry
+        output = subprocess.check_output(["arp", "-an"], text=True)
+        for match in _ARP_RE.finditer(output):
+            yield match.group(1), match.group(2)
 
 
 def get_ip_by_mac(mac_address):
     """Find IP address of a device by MAC address using ARP table."""
+    # Compare MACs in one form: lowercase, colon separated
+    target = mac_address.lower().replace("-", ":")
     try:
-        output = subprocess.check_output(["arp", "-a"], text=True)
-        
-        if platform.system() == "Windows":
-            # Windows ARP output: matches both colon and hyphen separated MAC addresses
-            pattern = re.compile(r"\(?(\d+\.\d+\.\d+\.\d+)\)?\s+([\da-fA-F]{2}(?:[:-][\da-fA-F]{2}){5})")
-        else:
-            # macOS ARP output: expects MAC addresses with colons and the "at" keyword
-            pattern = re.compile(r"\((.*?)\)\s+at\s+([0-9A-Fa-f:]{17})")
-
-        for match in pattern.findall(output):
-            ip, mac = match
-            if mac.lower() == mac_address.lower():
+        for ip, mac in _read_arp_table():
+            if mac.lower().replace("-", ":") == target:
                 return ip  # Return the matching IP address
 
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, OSError):
         return None
 
     return None  # If no match found
@@ -56,6 +119,28 @@ def ensure_arduino_connection(timeout=30, interval=5) -> str:
     return ""
 
 
+def _ensure_socket():
+    """Connect to the Arduino if there is no open socket; returns the socket."""
+    global _sock
+    if _sock is None:
+        s = socket.create_connection((arduino_ip, arduinoHTTPServerPort), timeout=10)  # 10-second timeout
+        # Commands are single short lines, so send them immediately (no Nagle delay)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _sock = s
+    return _sock
+
+
+def _close_socket():
+    """Close the persistent socket so the next command reconnects."""
+    global _sock
+    if _sock is not None:
+        try:
+            _sock.close()
+        except OSError:
+            pass
+        _sock = None
+
+
 def sendCmdToArduinoCar(command: str = "") -> str:
     """
     Sends the command to the Arduino RC car via TCP.
@@ -76,28 +161,46 @@ def sendCmdToArduinoCar(command: str = "") -> str:
             return
 
     # arduino_ip = ensure_arduino_connection()
-    arduinoHTTPServerPort = 23
 
     if command in ["jaw", "brow", "bite", "blink", ""]:
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(10)  # 10-second timeout
-                s.connect((arduino_ip, arduinoHTTPServerPort))
-                s.sendall((command + "\n").encode())
-                response = s.recv(2048).decode()
-                print("Arduino Response:", response)
-                return response
+            reused = _sock is not None
+            s = _ensure_socket()
+            s.sendall((command + "\n").encode())
+            response = s.recv(2048).decode()
+            if not response:
+                # The Arduino closed the connection. If it was an old connection,
+                # the command was lost with it, so resend it once on a new one.
+                _close_socket()
+                if reused:
+                    s = _ensure_socket()
+                    s.sendall((command + "\n").encode())
+                    response = s.recv(2048).decode()
+            print("Arduino Response:", response)
+            return response
 
         except socket.timeout:
             print("Timeout: Connection to Arduino failed.")
+            _close_socket()
             arduino_ip = ""
             return ""
 
         except Exception as e:
             print("Error sending command to Arduino:", e)
+            _close_socket()
             arduino_ip = ""
             return ""
 
+def sendCmdToArduinoCarAsync(command: str = ""):
+    """
+    Queues the command for the Arduino worker thread and returns immediately.
+
+    :param command: The command to send (jaw, brow, bite, blink, or empty for stop).
+    :return: A concurrent.futures.Future that resolves to the Arduino's response.
+    """
+    return _executor.submit(sendCmdToArduinoCar, command)
+
+
 if __name__ == '__main__':
     userInput = ""
 
@@ -1,3 +1,5 @@
+import os
+import sys
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
@@ -13,14 +15,14 @@ from scipy.signal import welch
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import confusion_matrix
-from action_dataloader import dataloader
+import action_dataloader
 
-# Load EEG Data X = eeg, y = labels and info = metadata
-X, y, info = dataloader()
+# load_features is shared with the other model, one directory up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feature_cache import load_features
 
-# Encode Labels for Classification (["biting", "blink", "eyebrow", "jaw"] to [0,1,2,3])
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
+# Extracted features are cached here between training runs.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
 
 # Feature Extraction
 def extract_features(eeg_data, sfreq):
@@ -31,42 +33,41 @@ def extract_features(eeg_data, sfreq):
     Returns: (n_samples, n_features)
     """
     n_samples, n_channels, n_timepoints = eeg_data.shape
-    features = []
-
-    for sample in eeg_data:
-        feature_vector = []
-
-        # **Compute Power Spectral Density (PSD) Using Welch’s Method**
-        for channel in sample:
-            freqs, psd = welch(channel, sfreq, nperseg=min(256, len(channel)))
-            feature_vector.extend([psd.mean()])
-            feature_vector.extend([psd.std()])
-
-        # Compute Time-Domain Statistics
-        feature_vector.extend(sample.mean(axis=1).tolist())
-        feature_vector.extend(sample.std(axis=1).tolist())
-        feature_vector.extend(skew(sample, axis=1).tolist())
-        feature_vector.extend(kurtosis(sample, axis=1).tolist())
-
-        features.append(feature_vector)
 
-    return np.array(features)
-
-
-# Extract Features from EEG Data, verify dims (n_samples, n_features)
-X_features = extract_features(X, info["sfreq"])
+    # **Compute Power Spectral Density (PSD) Using Welch’s Method**
+    # One batched call over every sample and channel: psd has shape (n_samples, n_channels, n_freqs).
+    freqs, psd = welch(eeg_data, sfreq, nperseg=min(256, n_timepoints), axis=-1)
+    # Per-channel (mean, std) pairs, interleaved as ch1_mean, ch1_std, ch2_mean, ...
+    psd_features = np.stack([psd.mean(axis=-1), psd.std(axis=-1)], axis=-1).reshape(n_samples, -1)
+
+    # Compute Time-Domain Statistics
+    features = np.concatenate(
+        [
+            psd_features,
+            eeg_data.mean(axis=-1),
+            eeg_data.std(axis=-1),
+            skew(eeg_data, axis=-1),
+            kurtosis(eeg_data, axis=-1),
+        ],
+        axis=1,
+    )
+
+    return features
+
+
+# Load EEG Data (X = eeg, y = labels) and extract features, verify dims (n_samples, n_features)
+X_features, y = load_features(extract_features, action_dataloader, CACHE_DIR)
 print(f"Feature matrix shape: {X_features.shape}")
 
-
-# Extract Features from EEG Data
-X_features = extract_features(X, info["sfreq"])
-print(f"Feature matrix shape: {X_features.shape}")
+# Encode Labels for Classification (["biting", "blink", "eyebrow", "jaw"] to [0,1,2,3])
+label_encoder = LabelEncoder()
+y_encoded = label_encoder.fit_transform(y)
 
 # Train-Test Split
 X_train, X_test, y_train, y_test = train_test_split(
     X_features,
     y_encoded,
-    test_size=0.9,
+    test_size=0.2,
     random_state=42,
     shuffle=True,
     stratify=y_encoded,
@@ -79,6 +80,7 @@ clf = RandomForestClassifier(
     max_depth=10,  # Limit tree depth
     min_samples_split=5,  # Prevent too-specific splits
     random_state=42,
+    n_jobs=-1,  # Fit (and predict) trees in parallel on all cores
 )
 clf.fit(X_train, y_train)
 
@@ -104,5 +106,5 @@ plt.ylabel("True Label")
 plt.title("Confusion Matrix")
 plt.show()
 
-# Save the model to a file named 'eeg_model.pkl'
-joblib.dump(clf, 'project_directory/scripts/demo/classifier/models/eeg_model.pkl')
\ No newline at end of file
+# Save the model and its label encoder (compressed) to a file named 'eeg_model.pkl'
+joblib.dump((clf, label_encoder), 'project_directory/scripts/demo/classifier/models/eeg_model.pkl', compress=3)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+import types
+import hashlib
+import numpy as np
+
+# Bump to invalidate every cached feature file, e.g. after a library upgrade
+# that changes the extracted values without any change to the code here.
+FEATURE_CACHE_VERSION = "1"
+
+def _hash_code(code, h):
+    """
+    Feeds a code object into h: its bytecode, referenced names and constants,
+    recursing into nested code (comprehensions, inner functions). Constants are
+    included so edits such as a new band edge or nperseg change the hash.
+    """
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, h)
+        elif isinstance(const, frozenset):
+            # Set iteration order varies between runs (string hash randomization).
+            h.update(repr(sorted(map(repr, const))).encode())
+        else:
+            h.update(repr(const).encode())
+
+def load_features(extract, dataloader_module, cache_dir):
+    """
+    Returns (X_features, y): dataloader_module.dataloader() followed by
+    extract(X, sfreq). The result is stored in cache_dir as an .npz keyed by
+    every recording's (path, mtime, size), the code of extract and of every
+    function in dataloader_module (which decides how the CSVs become X, y
+    and sfreq) and FEATURE_CACHE_VERSION. A matching file is loaded instead of
+    reading the CSVs again.
+    """
+    file_paths = dataloader_module.get_file_paths()
+    stats = sorted((p, os.path.getmtime(p), os.path.getsize(p)) for p in file_paths)
+    h = hashlib.sha1(FEATURE_CACHE_VERSION.encode())
+    h.update(repr(stats).encode())
+    _hash_code(extract.__code__, h)
+    for name, obj in sorted(vars(dataloader_module).items()):
+        if isinstance(obj, types.FunctionType) and obj.__module__ == dataloader_module.__name__:
+            h.update(name.encode())
+            _hash_code(obj.__code__, h)
+    cache_path = os.path.join(cache_dir, f"{h.hexdigest()}.npz")
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path)
+        print(f"Loaded cached features from {cache_path}")
+        return cached["X_features"], cached["y"]
+
+    X, y, info = dataloader_module.dataloader()
+    X_features = extract(X, info["sfreq"])
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(cache_path, X_features=X_features, y=y)
+    return X_features, y
@@ -1,3 +1,5 @@
+import os
+import sys
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
@@ -8,12 +10,14 @@ from scipy.signal import welch
 from scipy.stats import skew, kurtosis
 import matplotlib.pyplot as plt
 import seaborn as sns
-from filter_dataloader import dataloader
+import filter_dataloader
 
-# ---------------- Load Data ----------------
-# Use your dataloader to load EEG data and metadata.
-X, y, info = dataloader()
-fs = info["sfreq"]
+# load_features is shared with the other model, one directory up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feature_cache import load_features
+
+# Extracted features are cached here between training runs.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
 
 # Map action labels to filter names.
 # Adjust the mapping if necessary.
@@ -23,22 +27,12 @@ filter_mapping = {
     "blink": "Blink",
     "eyebrow": "Eyebrow"
 }
-# Convert labels to lowercase for consistency.
-filter_labels = [filter_mapping[label.lower()] for label in y]
 
 # ---------------- Helper Functions ----------------
-def compute_band_power(signal, fs, lowcut, highcut):
+def extract_filter_features(X, fs):
     """
-    Computes the band power of a signal using Welch's method.
-    """
-    freqs, psd = welch(signal, fs=fs, nperseg=min(256, len(signal)))
-    band_idx = (freqs >= lowcut) & (freqs <= highcut)
-    band_power = np.trapz(psd[band_idx], freqs[band_idx])
-    return band_power
-
-def extract_filter_features(snippet, fs):
-    """
-    Extracts features from an EEG snippet for filter selection.
+    Extracts features from a batch of EEG snippets for filter selection.
+    X has shape (n_samples, n_channels, n_timepoints); returns (n_samples, 6).
     
     Features:
       - Average variance across channels
@@ -48,19 +42,28 @@ def extract_filter_features(snippet, fs):
       - Average power in low-frequency band (0.1-4 Hz)
       - Ratio of high-frequency to low-frequency power
     """
-    avg_variance = np.mean(np.var(snippet, axis=1))
-    avg_skew = np.nanmean(skew(snippet, axis=1, nan_policy='omit'))
-    avg_kurtosis = np.nanmean(kurtosis(snippet, axis=1, nan_policy='omit'))
-    avg_high_freq_power = np.mean([compute_band_power(channel, fs, 20, 50) for channel in snippet])
-    avg_low_freq_power = np.mean([compute_band_power(channel, fs, 0.1, 4) for channel in snippet])
-    power_ratio = avg_high_freq_power / avg_low_freq_power if avg_low_freq_power != 0 else np.inf
-    return np.array([avg_variance, avg_skew, avg_kurtosis, avg_high_freq_power, avg_low_freq_power, power_ratio])
+    avg_variance = np.mean(np.var(X, axis=-1), axis=-1)
+    avg_skew = np.nanmean(skew(X, axis=-1, nan_policy='omit'), axis=-1)
+    avg_kurtosis = np.nanmean(kurtosis(X, axis=-1, nan_policy='omit'), axis=-1)
+    # One Welch PSD per channel (batched over all snippets), shared by both bands.
+    freqs, psd = welch(X, fs=fs, nperseg=min(256, X.shape[-1]), axis=-1)
+    high = (freqs >= 20) & (freqs <= 50)
+    low = (freqs >= 0.1) & (freqs <= 4)
+    avg_high_freq_power = np.trapezoid(psd[..., high], freqs[high], axis=-1).mean(axis=-1)
+    avg_low_freq_power = np.trapezoid(psd[..., low], freqs[low], axis=-1).mean(axis=-1)
+    power_ratio = np.divide(avg_high_freq_power, avg_low_freq_power,
+                            out=np.full_like(avg_high_freq_power, np.inf), where=avg_low_freq_power != 0)
+    return np.column_stack([avg_variance, avg_skew, avg_kurtosis, avg_high_freq_power, avg_low_freq_power, power_ratio])
 
-# ---------------- Feature Extraction ----------------
-# Extract features for each EEG snippet loaded by the dataloader.
-X_features = np.array([extract_filter_features(sample, fs) for sample in X])
+# ---------------- Load Data and Extract Features ----------------
+# Use your dataloader to load EEG data, then extract features for all snippets in
+# one batched pass (both skipped when the cached features are still valid).
+X_features, y = load_features(extract_filter_features, filter_dataloader, CACHE_DIR)
 print(f"Extracted feature matrix shape: {X_features.shape}")
 
+# Convert labels to lowercase for consistency.
+filter_labels = [filter_mapping[label.lower()] for label in y]
+
 # Encode filter labels (e.g., "Eyebrow", "Biting", "Blink", "Jaw Clench")
 label_encoder = LabelEncoder()
 y_encoded = label_encoder.fit_transform(filter_labels)
@@ -76,6 +79,7 @@ clf_filter = RandomForestClassifier(
     max_depth=10,
     min_samples_split=5,
     random_state=42,
+    n_jobs=-1,  # Fit (and predict) trees in parallel on all cores
 )
 clf_filter.fit(X_train, y_train)
 
@@ -96,4 +100,4 @@ plt.show()
 
 # ---------------- Save the Model ----------------
 # Save both the classifier and the label encoder for later use in real_time.py.
-joblib.dump((clf_filter, label_encoder), 'project_directory/scripts/demo/classifier/models/filter_selector.pkl')
+joblib.dump((clf_filter, label_encoder), 'project_directory/scripts/demo/classifier/models/filter_selector.pkl', compress=3)
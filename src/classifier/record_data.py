@@ -1,7 +1,6 @@
 import os
 import re
-import threading
-import time
+import numpy as np
 from pylsl import resolve_byprop, StreamInlet
 
 # Define the buffer directory (adjust this path as needed)
@@ -9,12 +8,17 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 BUFFER_DIR = os.path.join(current_dir, "..", "classifier", "buffer")
 BUFFER_DIR = os.path.normpath(BUFFER_DIR)
 
+# Compiled filename patterns, one per prefix
+_PATTERNS = {}
+
 def get_next_filename(directory, prefix):
     """
     Returns a new filename in the given directory with an incremented index.
     Example: If files like "buffer_01.csv" exist, this returns "buffer_02.csv".
     """
-    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
+    pattern = _PATTERNS.get(prefix)
+    if pattern is None:
+        pattern = _PATTERNS[prefix] = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
     max_num = 0
     for file in os.listdir(directory):
         match = pattern.match(file)
@@ -46,29 +50,32 @@ def record_sample(directory, prefix, target_samples=640, sample_rate=256, log_ca
         return
     inlet = StreamInlet(streams[0])
     
-    data_samples = []
-    timestamps = []
-    start_ts = None
+    # Preallocate the recording (one row per sample); timestamps stay float64.
+    n_channels = inlet.info().channel_count()
+    data_samples = np.empty((target_samples, n_channels), dtype=np.float32)
+    timestamps = np.empty(target_samples)
+    n_samples = 0
     log_interval = int(sample_rate * 0.5)  # log every 0.5 seconds (128 samples at 256 Hz)
     
-    while len(data_samples) < target_samples:
-        sample, ts = inlet.pull_sample(timeout=0.0)
-        if sample is None:
-            time.sleep(0.005)
+    # pull_chunk blocks on the LSL buffer (up to the timeout) and returns every
+    # sample that has arrived, so no sleep/poll loop is needed.
+    while n_samples < target_samples:
+        chunk, ts_chunk = inlet.pull_chunk(timeout=0.2, max_samples=target_samples - n_samples)
+        if not ts_chunk:
             continue
-        if start_ts is None:
-            start_ts = ts
-
-        data_samples.append(sample)
-        timestamps.append(ts)
+        k = len(ts_chunk)
+        data_samples[n_samples:n_samples + k] = chunk
+        timestamps[n_samples:n_samples + k] = ts_chunk
         
-        # Log progress every 0.5 seconds (i.e. every 128 samples)
-        if len(data_samples) % log_interval == 0:
-            seconds = len(data_samples) / sample_rate
+        # Log progress for every 0.5 seconds (i.e. every 128 samples) crossed by this chunk
+        for reached in range((n_samples // log_interval + 1) * log_interval, n_samples + k + 1, log_interval):
+            seconds = reached / sample_rate
             if log_callback:
                 log_callback(f"{seconds:.1f} seconds reached")
             else:
                 print(f"{seconds:.1f} seconds reached")
+        n_samples += k
+    start_ts = timestamps[0]
     
     if log_callback:
         log_callback("Recording ended.")
@@ -76,25 +83,15 @@ def record_sample(directory, prefix, target_samples=640, sample_rate=256, log_ca
         print("Recording ended.")
     
     if log_callback:
-        log_callback(f"Collected {len(data_samples)} samples over {timestamps[-1] - start_ts:.3f} seconds.\n")
+        log_callback(f"Collected {n_samples} samples over {timestamps[-1] - start_ts:.3f} seconds.\n")
     else:
-        print(f"Collected {len(data_samples)} samples over {timestamps[-1] - start_ts:.3f} seconds.")
-        
-    with open(file_path, 'w') as f:
-        header = "timestamps,TP9,AF7,AF8,TP10,Right AUX"
-        f.write(header + "\n")
-        for ts, sample in zip(timestamps, data_samples):
-            sample_str = ",".join(map(str, sample))
-            f.write(f"{ts},{sample_str}\n")
-
-def record_raw_snippet(log_callback=None):
-    """
-    Spawns a thread that records exactly 640 samples of raw EEG data.
-    Data is saved to the BUFFER_DIR.
-    The log_callback function is used for sending status messages.
-    """
-    threading.Thread(
-        target=record_sample,
-        args=(BUFFER_DIR, "buffer", 640, 256, log_callback),
-        daemon=True
-    ).start()
+        print(f"Collected {n_samples} samples over {timestamps[-1] - start_ts:.3f} seconds.")
+    
+    # Write all rows in one call: timestamps column followed by the channel columns.
+    # 9 significant digits round-trip every float32 sample exactly.
+    rows = np.empty((target_samples, 1 + n_channels))
+    rows[:, 0] = timestamps
+    rows[:, 1:] = data_samples
+    header = "timestamps,TP9,AF7,AF8,TP10,Right AUX"
+    np.savetxt(file_path, rows, delimiter=",", header=header, comments="",
+               fmt=["%.6f"] + ["%.9g"] * n_channels)
@@ -3,6 +3,7 @@ import re
 import threading
 import time
 import tkinter as tk
+import numpy as np
 from pylsl import resolve_byprop, StreamInlet
 
 # Define your project's data directory explicitly (change as needed)
@@ -18,79 +19,162 @@ EYEBROW_DIR = os.path.join(PROJECT_DATA_DIR, "eyebrow", "raw")
 for directory in [BLINK_DIR, JAW_DIR, BITE_DIR, EYEBROW_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Next free file index per (directory, prefix). Directories are scanned once (at
+# startup for the four recording folders); afterwards each recording bumps the counter.
+_next_index = {}
+_next_index_lock = threading.Lock()  # Recordings run on their own threads
+
+def _scan_max_index(directory, prefix):
+    """
+    Return the highest XX among the files named prefix_XX.csv in the directory (0 if none).
+    """
+    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
+    max_num = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = pattern.match(entry.name)
+            if match:
+                max_num = max(max_num, int(match.group(1)))
+    return max_num
+
 def get_next_filename(directory, prefix):
     """
     Look in the directory for files matching the pattern prefix_XX.csv,
     then return a new filename with the number incremented.
     """
-    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)\.csv$")
-    max_num = 0
-    for file in os.listdir(directory):
-        match = pattern.match(file)
-        if match:
-            num = int(match.group(1))
-            if num > max_num:
-                max_num = num
-    new_num = max_num + 1
+    with _next_index_lock:
+        key = (directory, prefix)
+        if key not in _next_index:
+            _next_index[key] = _scan_max_index(directory, prefix) + 1
+        new_num = _next_index[key]
+        _next_index[key] += 1
     return f"{prefix}_{new_num:02d}.csv"
 
+for directory, prefix in [(BLINK_DIR, "blink"), (JAW_DIR, "jaw"), (BITE_DIR, "bite"), (EYEBROW_DIR, "eyebrow")]:
+    _next_index[(directory, prefix)] = _scan_max_index(directory, prefix) + 1
+
+# One inlet shared by every recording; it is resolved on the first recording (on
+# that recording's thread, so the window never waits for it) instead of once per
+# button click, and dropped again if the stream stalls.
+_inlet = None
+_inlet_lock = threading.Lock()
+
+def get_inlet():
+    """
+    Return the shared EEG StreamInlet, resolving the stream if needed (None if no stream is found).
+    """
+    global _inlet
+    with _inlet_lock:
+        if _inlet is None:
+            print("Resolving EEG stream...")
+            streams = resolve_byprop('type', 'EEG', minimum=1, timeout=5.0)
+            if streams:
+                _inlet = StreamInlet(streams[0], max_buflen=360)
+        return _inlet
+
+def reset_inlet():
+    """
+    Drop the shared inlet so the next recording resolves the stream again.
+    """
+    global _inlet
+    with _inlet_lock:
+        _inlet = None
+
+# Recordings share the inlet, so they run one at a time.
+_record_lock = threading.Lock()
+
+# A recording that has not captured sample_duration seconds of data this many
+# seconds after sample_duration has passed is abandoned (e.g. the stream stalled).
+RECORD_TIMEOUT_MARGIN = 5.0
+
 def record_sample(directory, prefix, sample_duration=2.5):
     """
-    Uses pylsl to resolve an EEG stream via resolve_byprop.
-    It creates an inlet from the first available EEG stream and then
-    records data until the difference between the first sample's timestamp
-    and the current sample's timestamp is at least sample_duration seconds.
+    Records from the shared inlet of the first available EEG stream (resolved
+    via resolve_byprop, see get_inlet) until the difference between the first
+    sample's timestamp and the current sample's timestamp is at least
+    sample_duration seconds, or gives up if that has not happened within
+    sample_duration + RECORD_TIMEOUT_MARGIN seconds.
     A countdown is printed at every 0.5-second interval.
     The samples (returned as floats) and their timestamps are saved to a CSV file.
     """
-    filename = get_next_filename(directory, prefix)
-    file_path = os.path.join(directory, filename)
-    
-    print("Resolving EEG stream...")
-    streams = resolve_byprop('type', 'EEG', minimum=1, timeout=1.0)
-    if not streams:
+    with _record_lock:
+        _record_sample(directory, prefix, sample_duration)
+
+def _record_sample(directory, prefix, sample_duration):
+    inlet = get_inlet()
+    if inlet is None:
         print("No EEG stream found!")
         return
-    inlet = StreamInlet(streams[0])
+    # Drop samples queued since the last recording so this one starts now.
+    inlet.flush()
     
     print(f"Recording data until exactly {sample_duration} seconds of EEG data are captured...")
-    data_samples = []
-    timestamps = []
+    # Preallocate the capture buffers with some headroom over the expected sample count.
+    info = inlet.info()
+    nominal_fs = info.nominal_srate() or 256
+    n_est = int(sample_duration * nominal_fs * 1.2) + 1
+    sig_buf = np.empty((n_est, info.channel_count()), dtype=np.float32)
+    ts_buf = np.empty(n_est, dtype=np.float64)
+    n = 0
     start_ts = None
     next_threshold = 0.5  # next countdown marker in seconds
+    deadline = time.monotonic() + sample_duration + RECORD_TIMEOUT_MARGIN
     
-    # Pull samples until the timestamp difference reaches sample_duration
+    # Pull chunks of samples until the timestamp difference reaches sample_duration.
+    # The short blocking timeout lets pylsl wake the thread as soon as data arrives,
+    # instead of sleeping a fixed 5 ms (longer than a 256 Hz sample period) per empty poll.
     while True:
-        sample, ts = inlet.pull_sample(timeout=0.0)
-        if sample is None:
-            time.sleep(0.005)
+        if time.monotonic() > deadline:
+            # Nothing is saved; the stream is resolved afresh for the next recording.
+            print(f"Recording failed: the EEG stream stopped delivering data ({n} samples received). "
+                  "Nothing was saved.")
+            reset_inlet()
+            return
+        chunk, ts_chunk = inlet.pull_chunk(timeout=0.02, max_samples=64)
+        if not ts_chunk:
             continue
         if start_ts is None:
-            start_ts = ts
+            start_ts = ts_chunk[0]
             print("Recording started.")
-        data_samples.append(sample)
-        timestamps.append(ts)
         
-        elapsed = ts - start_ts
+        # Keep samples up to and including the first one that completes the duration.
+        ts_chunk = np.asarray(ts_chunk)
+        done = np.flatnonzero(ts_chunk - start_ts >= sample_duration)
+        k = done[0] + 1 if done.size else len(ts_chunk)
+        while n + k > len(ts_buf):
+            # More samples than estimated (e.g. a faster stream); grow the buffers.
+            sig_buf = np.concatenate([sig_buf, np.empty_like(sig_buf)])
+            ts_buf = np.concatenate([ts_buf, np.empty_like(ts_buf)])
+        sig_buf[n:n + k] = chunk[:k]
+        ts_buf[n:n + k] = ts_chunk[:k]
+        n += k
+        
+        elapsed = ts_buf[n - 1] - start_ts
         # Print countdown messages at every 0.5-second milestone.
-        if elapsed >= next_threshold:
+        while elapsed >= next_threshold:
             print(f"{next_threshold:.1f} seconds reached")
             next_threshold += 0.5
         
-        if elapsed >= sample_duration:
+        if done.size:
             print("Recording ended.")
             break
 
-    print(f"Collected {len(data_samples)} samples over {timestamps[-1] - start_ts:.3f} seconds.")
+    print(f"Collected {n} samples over {ts_buf[n - 1] - start_ts:.3f} seconds.")
     
-    # Save the recorded data to a CSV file.
+    # Muse samples carry no more precision than float32, so they are stored as float32
+    # values (9 significant digits, which round-trip every float32 exactly) rather
+    # than as float64 reprs; timestamps stay float64.
+    samples = sig_buf[:n]
+    out = np.column_stack([ts_buf[:n], samples])
+    
+    # Save the recorded data to a CSV file (the index is only taken for a completed recording).
+    filename = get_next_filename(directory, prefix)
+    file_path = os.path.join(directory, filename)
     with open(file_path, 'w') as f:
         # Write the custom header.
         header = "timestamps,TP9,AF7,AF8,TP10,Right AUX"
         f.write(header + "\n")
-        for ts, sample in zip(timestamps, data_samples):
-            sample_str = ",".join(map(str, sample))
-            f.write(f"{ts},{sample_str}\n")
+        np.savetxt(f, out, delimiter=",", fmt=["%.6f"] + ["%.9g"] * samples.shape[1])
     
     print(f"Data saved to: {file_path}")
 
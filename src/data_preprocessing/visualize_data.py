@@ -1,5 +1,7 @@
 import os
 import argparse
+import multiprocessing
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -36,10 +38,53 @@ def get_base_dir(action):
     else:
         raise ValueError(f"Unsupported action: {action}")
 
+def find_processed_file(processed_dir, filename):
+    """
+    Return the processed file for a raw CSV: the CSV of the same name, or the
+    Parquet file written by process_data.py --format parquet. None if neither exists.
+    """
+    csv_path = os.path.join(processed_dir, filename)
+    if os.path.exists(csv_path):
+        return csv_path
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return None
+
+def read_eeg_file(file_path, channels):
+    """
+    Load the timestamps and the given channels of an EEG recording from CSV or
+    Parquet, chosen by the file extension.
+    """
+    columns = ["timestamps"] + channels
+    if file_path.endswith(".parquet"):
+        return pd.read_parquet(file_path, columns=columns)
+    # Only the plotted columns are parsed, with fixed dtypes so no type inference runs;
+    # timestamps stay float64 to keep sub-second resolution.
+    dtypes = {"timestamps": np.float64, **{ch: np.float32 for ch in channels}}
+    return pd.read_csv(file_path, usecols=columns, dtype=dtypes, engine="c", memory_map=True)
+
+def decimate_for_plot(t, y, target=2000):
+    """
+    Thin a trace to about `target` points before plotting. Each bucket of samples
+    is drawn as its minimum and maximum, so spikes (e.g. blinks) are kept.
+    Traces already shorter than that (like 2.5 s recordings) are returned unchanged.
+    """
+    t = np.asarray(t)
+    y = np.asarray(y)
+    step = len(t) // (target // 2)
+    if step < 2:
+        return t, y
+    m = len(t) // step * step
+    buckets = y[:m].reshape(-1, step)
+    t_out = np.concatenate([np.repeat(t[:m:step], 2), t[m:]])
+    y_out = np.concatenate([np.column_stack([buckets.min(axis=1), buckets.max(axis=1)]).ravel(), y[m:]])
+    return t_out, y_out
+
 def plot_eeg_comparison(raw_file_path, processed_file_path, channels, plot_title="EEG Channels Comparison"):
-    # Load the CSV files.
-    raw_df = pd.read_csv(raw_file_path)
-    processed_df = pd.read_csv(processed_file_path)
+    # Load the raw and processed files.
+    raw_df = read_eeg_file(raw_file_path, channels)
+    processed_df = read_eeg_file(processed_file_path, channels)
     
     # Subtract the first timestamp so the time axis starts at 0.
     raw_df["timestamps"] = raw_df["timestamps"] - raw_df["timestamps"].iloc[0]
@@ -50,7 +95,7 @@ def plot_eeg_comparison(raw_file_path, processed_file_path, channels, plot_title
     
     # Plot raw data.
     for ch in channels:
-        axs[0].plot(raw_df["timestamps"], raw_df[ch], label=ch)
+        axs[0].plot(*decimate_for_plot(raw_df["timestamps"], raw_df[ch]), label=ch)
     axs[0].set_title("Raw Data")
     axs[0].set_xlabel("Time")
     axs[0].set_ylabel("Amplitude")
@@ -58,7 +103,7 @@ def plot_eeg_comparison(raw_file_path, processed_file_path, channels, plot_title
     
     # Plot processed data.
     for ch in channels:
-        axs[1].plot(processed_df["timestamps"], processed_df[ch], label=ch)
+        axs[1].plot(*decimate_for_plot(processed_df["timestamps"], processed_df[ch]), label=ch)
     axs[1].set_title("Processed Data")
     axs[1].set_xlabel("Time")
     axs[1].legend()
@@ -67,6 +112,26 @@ def plot_eeg_comparison(raw_file_path, processed_file_path, channels, plot_title
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
     return fig
 
+def _init_render_worker():
+    # Workers only write PNGs, so they use the non-interactive Agg backend.
+    plt.switch_backend("Agg")
+
+def _render_one(filename, raw_dir, processed_dir, plots_dir, channels):
+    """
+    Save the raw vs processed comparison plot for one file; returns the status message.
+    """
+    raw_path = os.path.join(raw_dir, filename)
+    processed_path = find_processed_file(processed_dir, filename)
+    if processed_path is None:
+        return f"Processed file not found for {filename}. Skipping."
+    base_name = os.path.splitext(filename)[0]
+    title = f"EEG Channels Comparison: {base_name}"
+    fig = plot_eeg_comparison(raw_path, processed_path, channels, plot_title=title)
+    save_path = os.path.join(plots_dir, base_name + ".png")
+    fig.savefig(save_path)
+    plt.close(fig)
+    return f"Saved plot for {filename} to {save_path}"
+
 def main():
     parser = argparse.ArgumentParser(
         description="Plot Raw and Processed EEG channels side by side, or batch save plots for an entire folder."
@@ -97,19 +162,12 @@ def main():
             print(f"No CSV files found in {raw_dir}.")
             return
         
-        for filename in csv_files:
-            raw_path = os.path.join(raw_dir, filename)
-            processed_path = os.path.join(processed_dir, filename)
-            if os.path.exists(processed_path):
-                base_name = os.path.splitext(filename)[0]
-                title = f"EEG Channels Comparison: {base_name}"
-                fig = plot_eeg_comparison(raw_path, processed_path, channels, plot_title=title)
-                save_path = os.path.join(plots_dir, base_name + ".png")
-                fig.savefig(save_path)
-                plt.close(fig)
-                print(f"Saved plot for {filename} to {save_path}")
-            else:
-                print(f"Processed file not found for {filename}. Skipping.")
+        # Each file is read, drawn and PNG-encoded independently, so the files are
+        # rendered in parallel, one worker process per core.
+        jobs = [(filename, raw_dir, processed_dir, plots_dir, channels) for filename in csv_files]
+        with multiprocessing.Pool(os.cpu_count(), initializer=_init_render_worker) as pool:
+            for message in pool.starmap(_render_one, jobs):
+                print(message)
     
     # If a filename is provided (and not using --save), plot that single file interactively.
     elif args.filename:
@@ -124,9 +182,9 @@ def main():
         processed_dir = os.path.join(base_dir, "processed", "data")
         
         raw_file_path = os.path.join(raw_dir, filename)
-        processed_file_path = os.path.join(processed_dir, filename)
+        processed_file_path = find_processed_file(processed_dir, filename)
         
-        if not os.path.exists(raw_file_path) or not os.path.exists(processed_file_path):
+        if not os.path.exists(raw_file_path) or processed_file_path is None:
             print(f"File '{filename}' not found in:\n  {raw_dir}\n  or\n  {processed_dir}")
             return
         
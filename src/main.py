@@ -1,4 +1,4 @@
-import sys, os, re, threading
+import sys, os, re, threading, functools
 from PyQt5.QtGui import QIcon, QFont
 from PyQt5.QtWidgets import (
     QApplication,
@@ -11,48 +11,131 @@ from PyQt5.QtWidgets import (
     QLabel,
     QHBoxLayout,
 )
-from PyQt5.QtCore import QProcess, QTimer, pyqtSignal
+from PyQt5.QtCore import QProcess, QTimer, QRunnable, QThreadPool, pyqtSignal
 from pylsl import resolve_byprop
 from UI.combined_view import CombinedViewWindow
 from UI.settings_window import SettingsWindow
-from classifier.record_data import record_raw_snippet
-from arduino.send_rc_car_cmd import sendCmdToArduinoCar
+from classifier.record_data import record_sample, BUFFER_DIR
+from arduino.send_rc_car_cmd import sendCmdToArduinoCarAsync
+
+# Directories the app loads its UI resources and classifier script from.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UI_DIR = os.path.join(BASE_DIR, "UI")
+ICONS_DIR = os.path.join(UI_DIR, "img")
+
+# Patterns used to parse muselsl output, compiled once at import.
+_IP_RE = re.compile(r"at\s+(\d+\.\d+\.\d+\.\d+)", re.IGNORECASE)
+_DEVICE_RE = re.compile(r"Found\s+device\s+([^,\s]+)", re.IGNORECASE)
+# Everything handle_stream_output looks for in one line of `muselsl stream`, found in
+# a single scan: group 1 "Disconnected", group 2 "No Muses found.", group 3 the
+# "Searching for Muses" banner (any case), which is cut from the logged text.
+_STREAM_RE = re.compile(
+    rb"(Disconnected)|(No Muses found\.)"
+    rb"|(?i:(Searching for Muses,? this may take up to 10 seconds\.{0,3}))"
+)
+# The banner exactly as muselsl prints it while connecting; such lines are skipped
+# with one comparison instead of the scan.
+_SEARCHING_BANNER = b"Searching for Muses, this may take up to 10 seconds..."
+
+# Commands that may wait for the Arduino worker at once; newer predictions are
+# dropped while it is this far behind, rather than replayed late.
+_MAX_PENDING_CMDS = 8
+
+# Map each predicted action to the command expected by the Arduino.
+_ACTION_CMD = {
+    "Biting": "bite",
+    "Blink": "blink",
+    "Eyebrow": "brow",
+    "Jaw Clench": "jaw",
+}
+
+# real_time.py prints the chosen filter, then the predicted action, for every inference.
+_FILTER_PREFIX = "Chosen Filter:"
+_ACTION_PREFIX = "Predicted Action:"
+
+
+@functools.lru_cache(maxsize=None)
+def load_icon(path):
+    """Returns the QIcon for an image file, decoding each file only once per process."""
+    return QIcon(path)
+
+
+def _read_lines(process):
+    """Yields each complete line buffered on the process's output, decoded and without its line ending."""
+    while process.canReadLine():
+        yield process.readLine().data().decode("utf-8", "replace").rstrip("\r\n")
+
 
+class RecordTask(QRunnable):
+    """Records one 2.5 second raw snippet on a QThreadPool thread."""
 
-def send_command_thread(command):
-    try:
-        sendCmdToArduinoCar(command)
-    except TimeoutError as te:
-        print("Warning: Arduino connection timed out. Check the device and try again.")
-    except Exception as e:
-        print("An error occurred:", e)
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+
+    def run(self):
+        try:
+            record_sample(BUFFER_DIR, "buffer", 640, 256, self.window.append_log)
+        except Exception as e:
+            self.window.append_log("Recording failed: " + str(e))
+        finally:
+            # Queued to the GUI thread, like log_signal.
+            self.window.recording_finished.emit()
+
+
+class StreamCheckTask(QRunnable):
+    """Runs MainWindow.check_stream_worker until the given stop event is set."""
+
+    def __init__(self, window, stop):
+        super().__init__()
+        self.window = window
+        self.stop = stop
+
+    def run(self):
+        self.window.check_stream_worker(self.stop)
 
 
 class MainWindow(QMainWindow):
     # Custom signals for logging and for when a stream is connected.
     log_signal = pyqtSignal(str)
     stream_connected = pyqtSignal()
+    # Emitted with (predicted filter, predicted action) whenever a new prediction arrives.
+    prediction_changed = pyqtSignal(str, str)
+    # Emitted from the recording thread once a snippet has been saved (or failed).
+    recording_finished = pyqtSignal()
 
     def __init__(self):
         super().__init__()
         self._active = True
 
-        # Compute base directory and icons directory dynamically.
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        icons_dir = os.path.join(base_dir, "UI", "img")
-        self.settings_icon_path = os.path.join(icons_dir, "settings.png")
+        self.settings_icon_path = os.path.join(ICONS_DIR, "settings.png")
 
         self.setWindowTitle("Brain Activity Monitor")
         self.resize(600, 400)
 
-        self.muse_stream_process = None
-        self.list_process = None
+        # The muselsl list and stream processes are created and wired once, then
+        # restarted for every listing or stream.
+        self.muse_stream_process = QProcess(self)
+        self.muse_stream_process.readyReadStandardOutput.connect(self.handle_stream_output)
+        self.muse_stream_process.finished.connect(self.handle_stream_finished)
+        self.muse_stream_process.errorOccurred.connect(self.handle_stream_error)
+        self.list_process = QProcess(self)
+        self.list_process.readyReadStandardOutput.connect(self.handle_list_output)
+        self.list_process.readyReadStandardError.connect(self.handle_list_error)
+        self.list_process.finished.connect(self.listing_finished)
         self.classifier_process = None  # Process for the classifier.
-        self.list_data = ""
-        self.connection_check_timer = None
+        self.list_data = []
+        self.connection_check_stop = None  # Event that stops the stream poller thread.
+        # One-thread pool for the stream poller: its thread is reused across streams, and
+        # a poller started right after another one was stopped waits for that one's
+        # resolve_byprop call to return instead of resolving alongside it.
+        self.connection_check_pool = QThreadPool(self)
+        self.connection_check_pool.setMaxThreadCount(1)
         self.combined_view_window = None  # Reference to the CombinedViewWindow.
         self.monitor_close_initiated = False  # Flag to track close initiation.
-        self.predicted_filter = "N/A"  # initialize predicted filter attribute
+        self.predicted_filter = "N/A"  # latest filter chosen by the classifier, shared with the settings window
+        self.predicted_action = "N/A"  # latest predicted action, shared with the settings window
+        self._pending_cmds = set()  # Arduino commands queued or being sent
 
         # Store a reference for the settings window.
         self.settings_window = None
@@ -62,6 +145,7 @@ class MainWindow(QMainWindow):
         # Connect signals: log_signal updates the UI and stream_connected updates UI on a successful connection.
         self.log_signal.connect(self.append_log_slot)
         self.stream_connected.connect(self.handle_stream_connected)
+        self.recording_finished.connect(self.handle_recording_finished)
 
         # Start the classifier process.
         self.start_classifier()
@@ -71,33 +155,39 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(central_widget)
         layout = QVBoxLayout(central_widget)
 
+        # Fonts shared by the widgets below.
+        text_font = QFont("Calibri", 12)
+        button_font = QFont("Segoe UI", 10)
+
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
-        self.log_output.setFont(QFont("Calibri", 12))
+        # Keep only the most recent lines so long sessions don't grow the log without bound.
+        self.log_output.document().setMaximumBlockCount(2000)
+        self.log_output.setFont(text_font)
         layout.addWidget(self.log_output)
 
         self.list_button = QPushButton("List Muse Devices")
-        self.list_button.setFont(QFont("Segoe UI", 10))
+        self.list_button.setFont(button_font)
         self.list_button.clicked.connect(self.list_devices)
         layout.addWidget(self.list_button)
 
         self.device_combo = QComboBox()
-        self.device_combo.setFont(QFont("Segoe UI", 10))
+        self.device_combo.setFont(button_font)
         layout.addWidget(self.device_combo)
 
         self.stream_button = QPushButton("Start Stream")
-        self.stream_button.setFont(QFont("Segoe UI", 10))
+        self.stream_button.setFont(button_font)
         self.stream_button.clicked.connect(self.toggle_stream)
         layout.addWidget(self.stream_button)
 
         self.combined_view_button = QPushButton("Launch Brainwave Monitor")
-        self.combined_view_button.setFont(QFont("Segoe UI", 10))
+        self.combined_view_button.setFont(button_font)
         self.combined_view_button.clicked.connect(self.launch_combined_view)
         self.combined_view_button.setEnabled(False)
         layout.addWidget(self.combined_view_button)
 
         self.record_button = QPushButton("Record Data")
-        self.record_button.setFont(QFont("Segoe UI", 10))
+        self.record_button.setFont(button_font)
         self.record_button.clicked.connect(self.record_snippet)
         self.record_button.setEnabled(False)
         layout.addWidget(self.record_button)
@@ -106,7 +196,7 @@ class MainWindow(QMainWindow):
         settings_layout = QHBoxLayout()
 
         self.predicted_action_label = QLabel("Predicted Action: None")
-        self.predicted_action_label.setFont(QFont("Calibri", 12))
+        self.predicted_action_label.setFont(text_font)
         settings_layout.addWidget(self.predicted_action_label)
 
         # Add a stretch to push the button to the right.
@@ -114,7 +204,7 @@ class MainWindow(QMainWindow):
 
         # Create the settings button with a square fixed size.
         self.settings_button = QPushButton()
-        self.settings_button.setIcon(QIcon(self.settings_icon_path))
+        self.settings_button.setIcon(load_icon(self.settings_icon_path))
         self.settings_button.setFixedSize(30, 30)  # Ensure the button is square.
         settings_layout.addWidget(self.settings_button)
 
@@ -147,37 +237,39 @@ class MainWindow(QMainWindow):
         self.combined_view_button.setEnabled(False)
         self.record_button.setEnabled(False)
         self.device_combo.clear()
-        self.list_data = ""
+        self.list_data = []
 
-        self.list_process = QProcess(self)
-        self.list_process.readyReadStandardOutput.connect(self.handle_list_output)
-        self.list_process.readyReadStandardError.connect(self.handle_list_error)
-        self.list_process.finished.connect(self.listing_finished)
-        self.list_process.start("muselsl list")
+        if self.list_process.state() == QProcess.NotRunning:
+            self.list_process.start("muselsl", ["list"])
 
     def handle_list_output(self):
-        text = bytes(self.list_process.readAllStandardOutput()).decode("utf-8")
-        if "Searching for Muses" not in text:
-            self.append_log(text)
-        self.list_data += text
+        for line in _read_lines(self.list_process):
+            if line and "Searching for Muses" not in line:
+                self.append_log(line)
+            self.list_data.append(line)
 
     def handle_list_error(self):
-        error = bytes(self.list_process.readAllStandardError()).decode("utf-8")
+        error = self.list_process.readAllStandardError().data().decode("utf-8", "replace")
         self.append_log("Error: " + error)
 
     def listing_finished(self, exitCode, exitStatus):
+        # Read whatever is still buffered, including a last line without a newline.
+        self.handle_list_output()
+        self.list_data.extend(
+            self.list_process.readAllStandardOutput().data().decode("utf-8", "replace").splitlines()
+        )
         self.append_log("Finished listing devices.\n")
         # Clear the combo box and insert a blank item.
         self.device_combo.clear()
         self.device_combo.addItem("")  # Blank entry for no specific device.
 
-        lines = self.list_data.splitlines()
-        ip_regex = re.compile(r"at\s+(\d+\.\d+\.\d+\.\d+)", re.IGNORECASE)
+        lines = self.list_data
+        self.list_data = []
         unwanted_msg = "Searching for Muses, this may take up to 10 seconds"
         for line in lines:
             if unwanted_msg in line:
                 continue
-            match = ip_regex.search(line)
+            match = _IP_RE.search(line)
             if match:
                 ip = match.group(1)
                 self.device_combo.addItem(line, ip)
@@ -187,22 +279,18 @@ class MainWindow(QMainWindow):
         self.stream_button.setEnabled(True)
 
     def toggle_stream(self):
-        if not self.muse_stream_process:
+        if not self.is_streaming():
             # Clear any previous device name.
             self.device_name = None
 
             selected_ip = self.device_combo.currentData()
             selected_text = self.device_combo.currentText().strip()
-            command = (
-                f"muselsl stream --address {selected_ip}"
-                if selected_ip
-                else "muselsl stream"
-            )
+            # Arguments are passed as a list, so Qt does not have to split a command string.
+            args = ["stream", "--address", selected_ip] if selected_ip else ["stream"]
 
             self.append_log("Starting stream...")
             if selected_text:
-                device_regex = re.compile(r"Found\s+device\s+([^,\s]+)", re.IGNORECASE)
-                match = device_regex.search(selected_text)
+                match = _DEVICE_RE.search(selected_text)
                 if match:
                     self.device_name = match.group(1)
                     self.append_log(f"Connecting to device {self.device_name}...")
@@ -213,12 +301,7 @@ class MainWindow(QMainWindow):
                     "Searching for Muses, this may take up to 10 seconds..."
                 )
 
-            self.stream_data = ""
-            self.muse_stream_process = QProcess(self)
-            self.muse_stream_process.readyReadStandardOutput.connect(
-                self.handle_stream_output
-            )
-            self.muse_stream_process.start(command)
+            self.muse_stream_process.start("muselsl", args)
 
             self.stream_button.setText("Stop Stream")
             self.record_button.setEnabled(False)
@@ -226,98 +309,126 @@ class MainWindow(QMainWindow):
             self.start_connection_check()
         else:
             self.append_log("Stopping stream...")
-            self.muse_stream_process.terminate()
-            QTimer.singleShot(100, self.check_stream_terminated)
+            self.stop_stream_process()
             self.stream_button.setText("Start Stream")
             self.record_button.setEnabled(False)
             self.combined_view_button.setEnabled(False)
             self.stop_connection_check()
 
     def handle_stream_output(self):
-        output = bytes(self.muse_stream_process.readAllStandardOutput()).decode("utf-8")
-
-        # Check for disconnection message.
-        if "Disconnected" in output:
-
-            # Log a custom disconnected message.
-            if self.device_name:
-                self.append_log(f"Device {self.device_name} Disconnected.")
-            else:
-                self.append_log("Device Disconnected.")
+        process = self.muse_stream_process
+        # The sentinels are ASCII, so they are matched on the raw bytes and only
+        # lines that may be logged are decoded.
+        while process.canReadLine():
+            raw = process.readLine().data()
+            stripped = raw.strip()
+            if not stripped or stripped == _SEARCHING_BANNER:
+                continue
 
-            # Turn the stream off if it is still running.
-            if self.muse_stream_process is not None:
-                self.muse_stream_process.terminate()
-                QTimer.singleShot(100, self.check_stream_terminated)
-            # Update UI elements.
-            self.stream_button.setText("Start Stream")
-            self.record_button.setEnabled(False)
-            self.combined_view_button.setEnabled(False)
+            disconnected = no_muses = False
+            kept, pos = [], 0
+            for match in _STREAM_RE.finditer(raw):
+                if match.lastindex == 1:
+                    disconnected = True
+                elif match.lastindex == 2:
+                    no_muses = True
+                else:
+                    kept.append(raw[pos:match.start()])
+                    pos = match.end()
+            kept.append(raw[pos:])
 
-            # Clear the device combo box and leave only a blank entry.
-            self.device_combo.clear()
-            self.device_combo.addItem("")
-            return
+            # Check for disconnection message.
+            if disconnected:
 
-        # Otherwise, filter out the "Searching for Muses" message.
-        filtered_text = re.sub(
-            r"Searching for Muses,? this may take up to 10 seconds\.{0,3}",
-            "",
-            output,
-            flags=re.IGNORECASE,
-        ).strip()
-        if filtered_text:
-            self.append_log(filtered_text)
-
-        self.stream_data += output
-        # If no Muses found while stream is running, toggle the stream.
-        if "No Muses found." in output and self.stream_button.text() == "Stop Stream":
-            self.toggle_stream()
+                # Log a custom disconnected message.
+                if self.device_name:
+                    self.append_log(f"Device {self.device_name} Disconnected.")
+                else:
+                    self.append_log("Device Disconnected.")
+
+                # Turn the stream off if it is still running.
+                self.stop_stream_process()
+                # Update UI elements.
+                self.stream_button.setText("Start Stream")
+                self.record_button.setEnabled(False)
+                self.combined_view_button.setEnabled(False)
+
+                # Clear the device combo box and leave only a blank entry.
+                self.device_combo.clear()
+                self.device_combo.addItem("")
+                return
+
+            # Otherwise, filter out the "Searching for Muses" message.
+            filtered_text = b"".join(kept).decode("utf-8", "replace").strip()
+            if filtered_text:
+                self.append_log(filtered_text)
+
+            # If no Muses found while stream is running, toggle the stream.
+            if no_muses and self.stream_button.text() == "Stop Stream":
+                self.toggle_stream()
+                return
 
     def start_connection_check(self):
-        """Starts a timer that triggers the stream check every second."""
-        self.connection_check_timer = QTimer(self)
-        self.connection_check_timer.timeout.connect(self.check_for_stream)
-        self.connection_check_timer.start(1000)
+        """Starts a background task that checks for the stream every second."""
+        self.stop_connection_check()
+        self.connection_check_stop = threading.Event()
+        self.connection_check_pool.start(StreamCheckTask(self, self.connection_check_stop))
 
     def stop_connection_check(self):
-        if self.connection_check_timer:
-            self.connection_check_timer.stop()
-            self.connection_check_timer = None
+        if self.connection_check_stop:
+            self.connection_check_stop.set()
+            self.connection_check_stop = None
 
-    def check_for_stream(self):
+    def check_stream_worker(self, stop):
         """
-        Offloads the blocking resolve_byprop call to a background thread to prevent UI lag.
+        Runs on the connection check pool until the stop event is set. Calls resolve_byprop
+        (a blocking call) once a second and emits a signal once a stream is found.
+        Only one resolve_byprop call is in flight at a time, however long it takes.
+        It checks that the main window is still active before emitting or logging.
         """
-        threading.Thread(target=self.check_stream_worker, daemon=True).start()
-
-    def check_stream_worker(self):
-        """
-        Runs in a separate thread. Calls resolve_byprop (a blocking call)
-        and emits a signal if a stream is found. It first checks if the main
-        window is still active.
-        """
-        try:
-            streams = resolve_byprop("type", "EEG", timeout=1)
-            if streams:
-                # Only emit the signal if the main window is still active.
+        while not stop.is_set():
+            try:
+                streams = resolve_byprop("type", "EEG", timeout=1)
+                if streams:
+                    # Only emit the signal if the main window is still active.
+                    if self._active and not stop.is_set():
+                        self.stream_connected.emit()
+                    return
+            except Exception as e:
+                # Only log if active.
                 if self._active:
-                    self.stream_connected.emit()
-        except Exception as e:
-            # Only log if active.
-            if self._active:
-                try:
-                    self.append_log("Error checking for stream: " + str(e))
-                except Exception:
-                    pass
-
-    def check_stream_terminated(self):
-        """Checks if the streaming process has terminated and kills it if not."""
-        if self.muse_stream_process is not None:
-            if self.muse_stream_process.state() != QProcess.NotRunning:
-                self.muse_stream_process.kill()
-                self.append_log("Stream process was forcibly ended.\n")
-            self.muse_stream_process = None
+                    try:
+                        self.append_log("Error checking for stream: " + str(e))
+                    except Exception:
+                        pass
+            stop.wait(1.0)
+
+    def is_streaming(self):
+        """True while the muselsl stream process is starting or running."""
+        return self.muse_stream_process.state() != QProcess.NotRunning
+
+    def stop_stream_process(self):
+        """Terminates the streaming process and kills it if it has not exited within 100 ms."""
+        process = self.muse_stream_process
+        if process.state() == QProcess.NotRunning:
+            return
+        process.terminate()
+        if not process.waitForFinished(100):
+            process.kill()
+            self.append_log("Stream process was forcibly ended.\n")
+
+    def handle_stream_finished(self, exitCode, exitStatus):
+        """Slot run when the streaming process exits, whether it was stopped or ended on its own."""
+        self.stream_button.setText("Start Stream")
+        self.record_button.setEnabled(False)
+        self.combined_view_button.setEnabled(False)
+        self.stop_connection_check()
+
+    def handle_stream_error(self, error):
+        # A stream that never started emits no finished signal, so reset the UI here.
+        if error == QProcess.FailedToStart:
+            self.append_log("Stream process failed to start: " + self.muse_stream_process.errorString())
+            self.handle_stream_finished(-1, QProcess.CrashExit)
 
     def handle_stream_connected(self):
         """Slot that runs in the main thread once the EEG stream is detected."""
@@ -362,9 +473,16 @@ class MainWindow(QMainWindow):
 
     def record_snippet(self):
         self.append_log("Recording 2.5 second snippet...")
-        record_raw_snippet(self.append_log)
+        # One recording at a time; the button comes back when this one is done.
+        self.record_button.setEnabled(False)
+        QThreadPool.globalInstance().start(RecordTask(self))
         self.append_log("Recording initiated.")
 
+    def handle_recording_finished(self):
+        # Only re-enable recording if the stream is still connected.
+        if self.is_streaming() and self.combined_view_button.isEnabled():
+            self.record_button.setEnabled(True)
+
     def start_classifier(self):
         self.classifier_process = QProcess(self)
         self.classifier_process.setProcessChannelMode(QProcess.MergedChannels)
@@ -382,40 +500,63 @@ class MainWindow(QMainWindow):
             )
         )
 
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        ui_dir = os.path.join(base_dir, "UI")
-        script_path = os.path.join(ui_dir, "real_time.py")
+        script_path = os.path.join(UI_DIR, "real_time.py")
         python_executable = sys.executable
 
-        self.classifier_process.setWorkingDirectory(ui_dir)
-        self.classifier_process.start(python_executable, ["-u", script_path])
+        self.classifier_process.setWorkingDirectory(UI_DIR)
+        # No -u: real_time.py flushes its own output once per prediction, so the pipe
+        # gets a few complete writes instead of many small unbuffered ones.
+        self.classifier_process.start(python_executable, [script_path])
         self.append_log("Classifier process started.\n")
 
     def handle_classifier_output(self):
-        output = bytes(self.classifier_process.readAllStandardOutput()).decode("utf-8")
-        for line in output.splitlines():
-            self.append_log(line)
-            if "Predicted Action:" in line:
-                parts = line.split("Predicted Action:")
-                if len(parts) > 1:
-                    action = parts[1].strip()
-                    self.predicted_action_label.setText("Predicted Action: " + action)
-                    # Map the predicted action to the command expected by the Arduino:
-                    command_mapping = {
-                        "Biting": "bite",
-                        "Blink": "blink",
-                        "Eyebrow": "brow",
-                        "Jaw Clench": "jaw",
-                    }
-                    command_to_send = command_mapping.get(action, "")
-                    if command_to_send:
-                        threading.Thread(
-                            target=send_command_thread, args=(command_to_send,)
-                        ).start()
+        # All lines from one read go to the log as a single append.
+        log_batch = []
+        for line in _read_lines(self.classifier_process):
+            log_batch.append(line)
+            i = line.find(_FILTER_PREFIX)
+            if i != -1:
+                # Emitted together with the action that follows it.
+                self.predicted_filter = line[i + len(_FILTER_PREFIX):].strip()
+                continue
+            i = line.find(_ACTION_PREFIX)
+            if i != -1:
+                action = line[i + len(_ACTION_PREFIX):].strip()
+                self.predicted_action = action
+                self.predicted_action_label.setText("Predicted Action: " + action)
+                self.prediction_changed.emit(self.predicted_filter, action)
+                command_to_send = _ACTION_CMD.get(action)
+                if command_to_send and len(self._pending_cmds) < _MAX_PENDING_CMDS:
+                    future = sendCmdToArduinoCarAsync(command_to_send)
+                    self._pending_cmds.add(future)
+                    future.add_done_callback(self.handle_command_result)
+        if log_batch:
+            self.append_log("\n".join(log_batch))
+
+    def handle_command_result(self, future):
+        # Runs on the Arduino worker thread; append_log hands the reply to the GUI thread.
+        self._pending_cmds.discard(future)
+        if future.cancelled():
+            return
+        try:
+            response = future.result()
+        except TimeoutError:
+            print("Warning: Arduino connection timed out. Check the device and try again.")
+            return
+        except Exception as e:
+            print("An error occurred:", e)
+            return
+        if response and self._active:
+            self.append_log("Arduino Response: " + response.strip())
 
     def closeEvent(self, event):
         # Prevent any further background processing.
         self._active = False
+        self.stop_connection_check()
+
+        # Drop Arduino commands that have not been sent yet.
+        for future in list(self._pending_cmds):
+            future.cancel()
 
         # Disconnect and terminate the classifier process, if running.
         if self.classifier_process is not None:
@@ -436,14 +577,17 @@ class MainWindow(QMainWindow):
             self.classifier_process = None
 
         # Disconnect and terminate the muse stream process, if running.
-        if self.muse_stream_process is not None:
+        if self.is_streaming():
             try:
                 self.muse_stream_process.readyReadStandardOutput.disconnect()
             except Exception:
                 pass
+            try:
+                self.muse_stream_process.finished.disconnect()
+            except Exception:
+                pass
             self.muse_stream_process.terminate()
             self.muse_stream_process.waitForFinished(100)
-            self.muse_stream_process = None
 
         # Also close the Brainwave Monitor (CombinedViewWindow) if it's open.
         if self.combined_view_window is not None:
@@ -454,13 +598,10 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
-    # Compute the base directory and icons directory dynamically.
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    icons_dir = os.path.join(base_dir, "UI", "img")
-    app_icon_path = os.path.join(icons_dir, "app_icon.png")
+    app_icon_path = os.path.join(ICONS_DIR, "app_icon.png")
 
     app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon(app_icon_path))
+    app.setWindowIcon(load_icon(app_icon_path))
     main_win = MainWindow()
     main_win.show()
     sys.exit(app.exec_())